@@ -0,0 +1,226 @@
+# This module renders the live progress dashboard shown while a phase is running.
+#
+# Tools stream their output through utils.tool_wrapper.stream_command, which sends
+# progress events (new line counts, HyperLogLog register updates and how much of
+# their stdin input has been fed) over a queue.
+# The dashboard consumes those events incrementally, keeps an approximate running
+# unique count for the phase in bounded memory and mirrors its state to a
+# machine-readable status file.
+import json
+import os
+import time
+from rich.console import Group
+from rich.table import Table
+from rich.text import Text
+from utils.hyperloglog import HyperLogLog
+
+# Window (in seconds) over which the current lines-per-second rate is computed
+RATE_WINDOW = 5.0
+
+
+def format_duration(seconds):
+    """Formats a number of seconds as H:MM:SS."""
+    seconds = int(max(seconds, 0))
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def format_input(fed, total):
+    """Formats the stdin lines fed to a tool, out of the total when it is known."""
+    if fed is None:
+        return "-"
+    return f"{fed:,} / {total:,}" if total is not None else f"{fed:,}"
+
+
+def format_backlog(backlog):
+    """Formats the stdin backlog of a phase ("-" when no tool's input size is known)."""
+    return "-" if backlog is None else f"{backlog:,} lines"
+
+
+class Dashboard:
+    """
+    Tracks per-tool progress for one phase and renders it as a rich table.
+
+    Args:
+        description (str): Title shown above the table.
+        status_file (str, optional): Path of the JSON status file. Defaults to "misc/status.json".
+        process_timeout (int, optional): Per-tool timeout, used as an upper-bound ETA.
+    """
+
+    def __init__(self, description, status_file="misc/status.json", process_timeout=None):
+        self.description = description
+        self.status_file = status_file
+        self.process_timeout = process_timeout
+        self.started_at = time.time()
+        self.tools = {}
+        self.unique_sketch = HyperLogLog()
+
+    def _tool(self, name):
+        if name not in self.tools:
+            self.tools[name] = {
+                'state': "starting",
+                'lines': 0,
+                'started_at': time.time(),
+                'finished_at': None,
+                'percent': None,
+                'returncode': None,
+                'worker': None,
+                'usage': None,
+                'input_fed': None, # Lines written to the tool's stdin, for tools fed that way
+                'input_total': None, # Known only when the input was given as a whole
+                'history': [], # (timestamp, cumulative lines) samples for the rate window
+            }
+        return self.tools[name]
+
+    def handle_event(self, event):
+        """Applies a single progress event sent by a streaming tool."""
+        tool = self._tool(event['tool'])
+        tool['worker'] = event.get('worker', tool['worker'])
+        now = time.time()
+        if event['event'] == 'start':
+            tool['state'] = "running"
+            tool['started_at'] = now
+        elif event['event'] == 'progress':
+            tool['lines'] += event.get('lines', 0)
+            self.unique_sketch.update(event.get('registers') or {})
+            if event.get('percent') is not None:
+                tool['percent'] = event['percent']
+            tool['history'].append((now, tool['lines']))
+            tool['history'] = [sample for sample in tool['history'] if now - sample[0] <= RATE_WINDOW]
+        elif event['event'] == 'input':
+            tool['input_fed'] = event['fed']
+            tool['input_total'] = event.get('total')
+        elif event['event'] == 'done':
+            tool['returncode'] = event.get('returncode')
+            tool['usage'] = event.get('usage')
+            # Keep a final state already set by the task manager (e.g. 'timed out')
+            if not tool['finished_at']:
+                tool['state'] = event.get('status') or ("done" if event.get('returncode') == 0 else f"exit {event.get('returncode')}")
+                tool['finished_at'] = now
+
+    def mark_worker(self, worker_pid, state):
+        """
+        Marks every unfinished tool started by a worker process with a final state
+        decided by the task manager (e.g. 'timed out').
+        """
+        for tool in self.tools.values():
+            if tool['worker'] == worker_pid and not tool['finished_at']:
+                tool['state'] = state
+                tool['finished_at'] = time.time()
+
+    def _rate(self, tool):
+        """Returns the current lines-per-second rate over the recent window."""
+        if tool['finished_at']:
+            return 0.0
+        history = tool['history']
+        if len(history) < 2:
+            elapsed = time.time() - tool['started_at']
+            return tool['lines'] / elapsed if elapsed > 0 else 0.0
+        (t0, l0), (t1, l1) = history[0], history[-1]
+        return (l1 - l0) / (t1 - t0) if t1 > t0 else 0.0
+
+    def _eta(self, tool):
+        """
+        Returns (seconds, is_upper_bound) for a running tool. Tools reporting a
+        completion percentage get a projected ETA; others fall back to the time
+        left before their timeout.
+        """
+        if tool['finished_at']:
+            return 0, False
+        elapsed = time.time() - tool['started_at']
+        if tool['percent']:
+            return elapsed * (100 - tool['percent']) / tool['percent'], False
+        if self.process_timeout:
+            return self.process_timeout - elapsed, True
+        return None, False
+
+    def _input_backlog(self):
+        """
+        Returns the number of input lines not yet written to the running tools' stdin,
+        or None if no running tool was given an input of known size.
+        """
+        backlogs = [tool['input_total'] - tool['input_fed'] for tool in self.tools.values()
+                    if tool['input_total'] is not None and not tool['finished_at']]
+        return sum(backlogs) if backlogs else None
+
+    def snapshot(self):
+        """Returns the dashboard state as a JSON-serializable dictionary."""
+        tools = {}
+        for name, tool in self.tools.items():
+            eta, upper_bound = self._eta(tool)
+            end = tool['finished_at'] or time.time()
+            tools[name] = {
+                'state': tool['state'],
+                'lines': tool['lines'],
+                'lines_per_second': round(self._rate(tool), 2),
+                'elapsed_seconds': round(end - tool['started_at'], 1),
+                'percent': tool['percent'],
+                'eta_seconds': round(eta, 1) if eta is not None else None,
+                'eta_is_upper_bound': upper_bound,
+                'usage': tool['usage'],
+                'input_lines_fed': tool['input_fed'],
+                'input_lines_total': tool['input_total'],
+            }
+        return {
+            'phase': self.description,
+            'updated_at': time.time(),
+            'elapsed_seconds': round(time.time() - self.started_at, 1),
+            'unique_results': self.unique_sketch.count(),
+            'input_backlog': self._input_backlog(),
+            'tools': tools,
+        }
+
+    def write_status(self):
+        """Atomically writes the current snapshot to the status file."""
+        if not self.status_file:
+            return
+        try:
+            status_dir = os.path.dirname(self.status_file)
+            if status_dir:
+                os.makedirs(status_dir, exist_ok=True)
+            tmp_file = f"{self.status_file}.tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump(self.snapshot(), f, indent=2)
+            os.replace(tmp_file, self.status_file)
+        except OSError:
+            pass # The status file is informational; never interrupt a scan over it
+
+    def render(self):
+        """Builds the rich renderable for the live display."""
+        snapshot = self.snapshot()
+        table = Table(expand=False, header_style="bold cyan")
+        table.add_column("Tool")
+        table.add_column("State")
+        table.add_column("Lines", justify="right")
+        table.add_column("Lines/s", justify="right")
+        table.add_column("Elapsed", justify="right")
+        table.add_column("ETA", justify="right")
+        table.add_column("Input fed", justify="right")
+        table.add_column("CPU", justify="right")
+        table.add_column("Peak RSS", justify="right")
+
+        for name, tool in snapshot['tools'].items():
+            usage = tool['usage'] or {}
+            state_style = "green" if tool['state'] == "done" else "yellow" if tool['state'] == "running" else "red"
+            if tool['eta_seconds'] is None or tool['state'] != "running":
+                eta = "-"
+            else:
+                eta = ("<= " if tool['eta_is_upper_bound'] else "") + format_duration(tool['eta_seconds'])
+            table.add_row(
+                name,
+                Text(tool['state'], style=state_style),
+                f"{tool['lines']:,}",
+                f"{tool['lines_per_second']:,.1f}",
+                format_duration(tool['elapsed_seconds']),
+                eta,
+                format_input(tool['input_lines_fed'], tool['input_lines_total']),
+                f"{usage['cpu_user_seconds'] + usage['cpu_system_seconds']:.1f}s" if 'cpu_user_seconds' in usage else "-",
+                f"{usage['max_rss_mb']} MB" if 'max_rss_mb' in usage else "-",
+            )
+
+        summary = Text.from_markup(
+            f"[bold cyan]{self.description}[/bold cyan]  "
+            f"unique results: [bold green]{snapshot['unique_results']:,}[/bold green]  "
+            f"stdin backlog: [bold]{format_backlog(snapshot['input_backlog'])}[/bold]  "
+            f"elapsed: {format_duration(snapshot['elapsed_seconds'])}"
+        )
+        return Group(summary, table)
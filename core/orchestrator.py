@@ -6,10 +6,17 @@ from rich.console import Console
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from core.task_manager import run_tasks_in_parallel
-from modules.subdomain_enum import run_subfinder, run_assetfinder, run_findomain
+from utils.run_archive import ARCHIVABLE_PHASES, archive_phase, restore_from_archive
+from modules.subdomain_enum import run_subfinder, run_assetfinder, run_findomain, run_subdomain_bruteforce, get_bruteforce_settings
 from modules.host_discovery import run_httpx
 from modules.crawling import run_katana, run_gau
-from modules.vuln_scanning import run_nuclei
+from modules.content_discovery import run_content_discovery, get_content_discovery_settings
+from modules.vuln_scanning import (
+    prepare_host_targets, prepare_url_targets, nuclei_result_host,
+    run_nuclei_host_scan, run_nuclei_url_scan, merge_nuclei_results,
+)
+from utils.global_index import open_global_index, get_global_index_settings, filter_stage_input, record_stage_results
+from utils.url_utils import normalize_origin, url_hostname
 
 console = Console()
 
@@ -57,6 +64,26 @@ def combine_and_save_raw_results(raw_output_files, output_filename):
         return []
 
 
+def prepare_stage_input(stage, input_file, key_func, domain, config, index, cached_file, allow_cdn_skip=True):
+    """
+    Applies the global index (and optional CDN skipping) to a stage's input.
+
+    Returns:
+        tuple: (path of the input still to process, or None if nothing is left;
+                path of the file holding results reused from earlier runs, or None)
+    """
+    skip_cdn = allow_cdn_skip and get_global_index_settings(config)['skip_cdn']
+    if not index and not skip_cdn:
+        return input_file, None
+
+    base, ext = os.path.splitext(input_file)
+    pending_file = f"{base}_pending{ext}"
+    written, reused = filter_stage_input(stage, input_file, pending_file, key_func, domain, config, index, allow_cdn_skip)
+    if reused:
+        save_results(sorted(set(reused)), cached_file)
+    return (pending_file if written else None), (cached_file if reused else None)
+
+
 def run_subdomain_enumeration_phase(domain, config):
     """Orchestrates the subdomain enumeration phase (Phase 1)."""
     console.print("\n\n" + "="*50)
@@ -73,6 +100,14 @@ def run_subdomain_enumeration_phase(domain, config):
         process_timeout=process_timeout
     )
 
+    # The active stage runs after the passive tools, as it permutes the names they found
+    if get_bruteforce_settings(config)['enabled']:
+        # Its own 'timeout' setting is enforced on dnsx directly, so no process timeout here
+        raw_subdomain_files += run_tasks_in_parallel(
+            [run_subdomain_bruteforce], domain, config,
+            description="Resolving bruteforce and permutation candidates..."
+        )
+
     # Combine and save results from the individual raw output files
     all_subdomains = combine_and_save_raw_results(raw_subdomain_files, "subs/all_subdomains.txt")
 
@@ -88,19 +123,39 @@ def run_host_discovery_phase(domain, config):
     console.print("="*50 + "\n")
 
     subdomains_file = "subs/all_subdomains.txt"
-    if not os.path.exists(subdomains_file) or os.path.getsize(subdomains_file) == 0:
+    if not restore_from_archive(subdomains_file, config):
         console.print("[yellow][!] Subdomain list not found. Running Phase 1 first...[/yellow]")
         # If phase 1 doesn't find subdomains, abort phase 2
         if not run_subdomain_enumeration_phase(domain, config):
             console.print("[bold red][!] Phase 1 did not find any subdomains. Aborting Phase 2.[/bold red]")
             return []
     
-    # HTTPX is run individually, not in parallel with other tools in this phase
-    # It now returns the path to its output file
-    httpx_output_file = run_httpx(subdomains_file, config)
+    # Subdomains probed by an earlier run reuse its live hosts instead of being probed again
+    global_index = open_global_index(config)
+    subdomain_key = lambda line: line.lower()
+    probe_file, cached_file = prepare_stage_input(
+        "httpx", subdomains_file, subdomain_key, domain, config, global_index,
+        "hosts/global_index_cached.txt", allow_cdn_skip=False
+    )
+
+    # HTTPX is the only tool in this phase; it goes through the task manager for the
+    # live dashboard, without a timeout as it has to probe every subdomain
+    httpx_output_files = []
+    if probe_file:
+        httpx_output_files, probe_completed = run_tasks_in_parallel(
+            [run_httpx], probe_file, config,
+            description="Probing for live hosts...",
+            with_status=True
+        )
+        # Only a complete probe may mark subdomains as processed; a failed one would make them look dead
+        record_stage_results("httpx", probe_file, httpx_output_files, subdomain_key,
+                             url_hostname, domain, global_index,
+                             completed=probe_completed)
+    if global_index:
+        global_index.close()
     
-    # Combine and save results (even if only one file for now)
-    live_hosts = combine_and_save_raw_results([httpx_output_file], "hosts/live_hosts.txt")
+    # Combine and save results, including live hosts reused from earlier runs
+    live_hosts = combine_and_save_raw_results(httpx_output_files + [cached_file], "hosts/live_hosts.txt")
 
     console.print("\n" + "="*50)
     console.print("[bold blue]      PHASE 2: LIVE HOST DISCOVERY COMPLETE[/bold blue]")
@@ -114,25 +169,51 @@ def run_crawling_phase(domain, config):
     console.print("="*50 + "\n")
 
     live_hosts_file = "hosts/live_hosts.txt"
-    if not os.path.exists(live_hosts_file) or os.path.getsize(live_hosts_file) == 0:
+    if not restore_from_archive(live_hosts_file, config):
         console.print("[yellow][!] Live host list not found. Running Phase 2 first...[/yellow]")
         # If phase 2 doesn't find live hosts, abort phase 3
         if not run_host_discovery_phase(domain, config):
             console.print("[bold red][!] Phase 2 did not find any live hosts. Aborting Phase 3.[/bold red]")
             return []
 
-    process_timeout = config.get('settings', {}).get('process_timeout', 600)
-    crawling_tasks = [run_katana, run_gau]
-    
-    # run_tasks_in_parallel will now return a list of file paths (or None)
-    raw_url_files = run_tasks_in_parallel(
-        crawling_tasks, live_hosts_file, config,
-        description="Crawling for URLs...",
-        process_timeout=process_timeout
+    # Hosts crawled by an earlier run or target reuse its URLs instead of being crawled again
+    global_index = open_global_index(config)
+    crawl_file, cached_file = prepare_stage_input(
+        "crawl", live_hosts_file, normalize_origin, domain, config, global_index,
+        "urls/global_index_cached.txt"
     )
 
+    raw_url_files = []
+    if crawl_file:
+        process_timeout = config.get('settings', {}).get('process_timeout', 600)
+        crawling_tasks = [run_katana, run_gau]
+        
+        # run_tasks_in_parallel will now return a list of file paths (or None)
+        raw_url_files, crawl_completed = run_tasks_in_parallel(
+            crawling_tasks, crawl_file, config,
+            description="Crawling for URLs...",
+            process_timeout=process_timeout,
+            with_status=True
+        )
+
+        # Content discovery finds what crawling cannot: content that is not linked anywhere.
+        # Its own 'timeout' setting is enforced on ffuf directly, so no process timeout here
+        if get_content_discovery_settings(config)['enabled']:
+            fuzzing_files, fuzzing_completed = run_tasks_in_parallel(
+                [run_content_discovery], crawl_file, config,
+                description="Fuzzing for unlinked content...",
+                with_status=True
+            )
+            raw_url_files += fuzzing_files
+            crawl_completed = crawl_completed and fuzzing_completed
+        # URLs are stored per host, so the http:// URLs gau reports for https:// hosts are kept too
+        record_stage_results("crawl", crawl_file, raw_url_files, normalize_origin, url_hostname, domain, global_index,
+                             completed=crawl_completed)
+    if global_index:
+        global_index.close()
+
     # Combine and save results from the individual raw output files
-    all_urls = combine_and_save_raw_results(raw_url_files, "urls/all_urls.txt")
+    all_urls = combine_and_save_raw_results(raw_url_files + [cached_file], "urls/all_urls.txt")
     
     console.print("\n" + "="*50)
     console.print("[bold blue]      PHASE 3: CRAWLING & URL GATHERING COMPLETE[/bold blue]")
@@ -146,22 +227,82 @@ def run_vuln_scanning_phase(domain, config):
     console.print("="*50 + "\n")
 
     urls_file = "urls/all_urls.txt"
-    if not os.path.exists(urls_file) or os.path.getsize(urls_file) == 0:
+    if not restore_from_archive(urls_file, config):
         console.print("[yellow][!] URL list not found. Running Phase 3 first...[/yellow]")
         # If phase 3 doesn't find URLs, abort phase 4
         if not run_crawling_phase(domain, config):
             console.print("[bold red][!] Phase 3 did not find any URLs. Aborting Phase 4.[/bold red]")
             return
 
-    # Nuclei is run individually, not in parallel with other tools in this phase (for now)
-    # It now returns the path to its output file
-    nuclei_output_file = run_nuclei(urls_file, config)
-    
-    # Combine and save results (even if only one file for now)
-    # This step is here for consistency and future expansion if more vuln scanners are added
-    all_vulns = combine_and_save_raw_results([nuclei_output_file], "vulns/all_vulns.txt")
+    # Host-level templates only need to see each origin once, so they run against
+    # the deduplicated live hosts instead of every crawled URL.
+    # Hosts and URLs scanned by an earlier run or target are skipped; the findings
+    # from those runs are reused
+    global_index = open_global_index(config)
+    host_output_files = []
+    url_output_files = []
+    live_hosts_file = "hosts/live_hosts.txt"
+    host_targets_file = "vulns/nuclei_host_targets.txt"
+    if restore_from_archive(live_hosts_file, config) and prepare_host_targets(live_hosts_file, host_targets_file):
+        scan_file, cached_file = prepare_stage_input(
+            "nuclei_host", host_targets_file, normalize_origin, domain, config, global_index,
+            "vulns/nuclei_host_cached.txt"
+        )
+        host_output_files.append(cached_file)
+        if scan_file:
+            scan_output_files, host_scan_completed = run_tasks_in_parallel(
+                [run_nuclei_host_scan], scan_file, config,
+                description="Running host-level Nuclei scan...",
+                with_status=True
+            )
+            host_output_files.extend(scan_output_files)
+            record_stage_results("nuclei_host", scan_file, scan_output_files, normalize_origin,
+                                 nuclei_result_host, domain, global_index,
+                                 completed=host_scan_completed)
+    else:
+        console.print("[yellow][!] No live hosts available. Skipping host-level Nuclei scan.[/yellow]")
+
+    # URL-level templates only run against URLs that carry parameters
+    url_targets_file = "vulns/nuclei_url_targets.txt"
+    if prepare_url_targets(urls_file, url_targets_file):
+        url_key = lambda url: url
+        scan_file, cached_file = prepare_stage_input(
+            "nuclei_url", url_targets_file, url_key, domain, config, global_index,
+            "vulns/nuclei_url_cached.txt"
+        )
+        url_output_files.append(cached_file)
+        if scan_file:
+            scan_output_files, url_scan_completed = run_tasks_in_parallel(
+                [run_nuclei_url_scan], scan_file, config,
+                description="Running URL-level Nuclei scan...",
+                with_status=True
+            )
+            url_output_files.extend(scan_output_files)
+            # Findings are stored per host, like the host-level ones, so skipped URLs bring them back
+            record_stage_results("nuclei_url", scan_file, scan_output_files, url_key,
+                                 nuclei_result_host, domain, global_index,
+                                 completed=url_scan_completed)
+    else:
+        console.print("[yellow][!] No parameterized URLs found. Skipping URL-level Nuclei scan.[/yellow]")
+    if global_index:
+        global_index.close()
+
+    # Merge both passes: one finding per (template, host) for host-level templates,
+    # per (template, endpoint, parameter names) for URL-level ones
+    all_vulns = merge_nuclei_results(host_output_files, url_output_files, "vulns/all_vulns.txt")
 
     console.print("\n" + "="*50)
     console.print("[bold blue]      PHASE 4: VULNERABILITY SCANNING COMPLETE[/bold blue]")
     console.print("="*50 + "\n")
     return all_vulns
+
+def archive_run_outputs(config):
+    """
+    Packs the outputs of every finished phase into compressed archives under archive/.
+    Archived files are restored automatically when a later phase needs them.
+    """
+    console.print("\n[yellow][*] Archiving phase outputs...[/yellow]")
+    archives = [path for path in (archive_phase(phase_dir, config) for phase_dir in ARCHIVABLE_PHASES) if path]
+    if not archives:
+        console.print("[yellow][!] No phase outputs found to archive.[/yellow]")
+    return archives
@@ -1,65 +1,152 @@
 import multiprocessing
+import queue
+import signal
+import time
 from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn
+from rich.live import Live
 
 # --- Smart Environment Setup ---
 import os
 os.environ['PATH'] = f"{os.path.join(os.path.expanduser('~'), 'go', 'bin')}:{os.path.join(os.path.expanduser('~'), '.local', 'bin')}:{os.environ['PATH']}"
 # --- End of Smart Environment Setup ---
 
+from core.dashboard import Dashboard
+from utils.tool_wrapper import (
+    set_progress_queue, set_resource_limits, get_resource_limits, kill_active_processes,
+    reset_run_statuses, get_run_statuses,
+)
+
 console = Console()
 
-def run_task(task, target, config, results_queue):
+REFRESH_PER_SECOND = 4
+# How often (in seconds) the machine-readable status file is rewritten
+STATUS_WRITE_INTERVAL = 2
+
+def stop_worker(signum, frame):
+    """SIGTERM handler for task processes: takes the tools they started down with them."""
+    kill_active_processes()
+    raise SystemExit(128 + signum)
+
+
+def run_task(task, target, config, results_queue, progress_queue=None):
     """
-    A wrapper function to execute a single task and put its result into a queue.
+    A wrapper function to execute a single task and put its result into a queue,
+    together with whether it completed: no exception, and every tool it ran exited
+    normally (not timed out, not missing, exit code 0).
     """
+    # Ctrl-C is handled by the parent, which terminates this process; SIGTERM then
+    # kills the tools' process groups, which do not receive the terminal's SIGINT.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, stop_worker)
+    set_progress_queue(progress_queue)
+    set_resource_limits(get_resource_limits(config))
+    reset_run_statuses()
+    result = None
+    completed = False
     try:
         result = task(target, config)
-        if result:
-            results_queue.put(result)
+        completed = all(run['status'] == "done" for run in get_run_statuses())
     except Exception as e:
         console.print(f"[bold red][!] Error in task '{task.__name__}': {e}[/bold red]")
+    results_queue.put((result, completed))
 
 
-def run_tasks_in_parallel(tasks, target, config, description="Running tasks in parallel...", process_timeout=None):
+def stop_task_process(process, grace_seconds):
     """
-    Executes a list of tasks in parallel using multiprocessing with a timeout.
+    Asks a task process to stop (it kills its tools on SIGTERM) and force-kills it
+    if it has not exited once the tools' grace period has passed.
+    """
+    process.terminate()
+    process.join(timeout=grace_seconds + 2)
+    if process.is_alive():
+        process.kill()
+        process.join()
+
+
+def drain_progress_events(progress_queue, dashboard, wait=0):
+    """
+    Applies all queued progress events to the dashboard.
+    Waits up to `wait` seconds for the first event if the queue is empty.
+    """
+    try:
+        event = progress_queue.get(timeout=wait) if wait else progress_queue.get_nowait()
+    except queue.Empty:
+        return
+    while True:
+        dashboard.handle_event(event)
+        try:
+            event = progress_queue.get_nowait()
+        except queue.Empty:
+            return
+
+
+def run_tasks_in_parallel(tasks, target, config, description="Running tasks in parallel...", process_timeout=None,
+                          with_status=False):
+    """
+    Executes a list of tasks in parallel using multiprocessing with a timeout,
+    showing a live dashboard fed by the tools' streamed output.
+
+    Returns the unique task results. With with_status=True, returns a tuple
+    (results, completed) where completed is False if any task failed, timed out,
+    was interrupted or ran a tool that did not finish normally, i.e. whenever the
+    results may be partial.
     """
     results_queue = multiprocessing.Queue()
+    progress_queue = multiprocessing.Queue()
+    dashboard = Dashboard(description, process_timeout=process_timeout)
+    kill_grace = get_resource_limits(config)['kill_grace_seconds']
     processes = []
     all_results = []
 
     for task in tasks:
-        process = multiprocessing.Process(target=run_task, args=(task, target, config, results_queue))
-        processes.append(process)
+        process = multiprocessing.Process(target=run_task, args=(task, target, config, results_queue, progress_queue))
         process.start()
+        deadline = time.monotonic() + process_timeout if process_timeout else None
+        processes.append((process, deadline))
 
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        transient=True,
-    ) as progress:
-        progress.add_task(description=f"[cyan]{description}[/cyan]", total=None)
-        
-        # Wait for all processes to complete, with a timeout for each one
-        for process in processes:
-            try:
-                process.join(timeout=process_timeout)
+    last_status_write = 0
+    with Live(dashboard.render(), console=console, refresh_per_second=REFRESH_PER_SECOND, transient=False) as live:
+        try:
+            # Keep consuming progress events until every task has finished or timed out
+            while any(process.is_alive() for process, _ in processes):
+                drain_progress_events(progress_queue, dashboard, wait=1 / REFRESH_PER_SECOND)
+                for process, deadline in processes:
+                    if deadline and process.is_alive() and time.monotonic() > deadline:
+                        console.print(f"[yellow][!] Task process {process.pid} timed out after {process_timeout} seconds. Terminating.[/yellow]")
+                        stop_task_process(process, kill_grace)
+                        dashboard.mark_worker(process.pid, "timed out")
+
+                live.update(dashboard.render())
+                if time.monotonic() - last_status_write >= STATUS_WRITE_INTERVAL:
+                    dashboard.write_status()
+                    last_status_write = time.monotonic()
+        except KeyboardInterrupt:
+            for process, _ in processes:
                 if process.is_alive():
-                    console.print(f"[yellow][!] Task process {process.pid} timed out after {process_timeout} seconds. Terminating.[/yellow]")
-                    process.terminate() # Forcefully stop the process
-                    process.join() # Clean up the terminated process
-            except KeyboardInterrupt:
-                console.print(f"[bold red]User interrupted. Terminating process {process.pid}...[/bold red]")
-                process.terminate()
-                process.join()
+                    console.print(f"[bold red]User interrupted. Terminating process {process.pid}...[/bold red]")
+                    stop_task_process(process, kill_grace)
+                    dashboard.mark_worker(process.pid, "interrupted")
 
+        for process, _ in processes:
+            process.join()
+        drain_progress_events(progress_queue, dashboard)
+        live.update(dashboard.render())
+        dashboard.write_status()
 
+    # Tasks that were terminated (timeout, Ctrl-C) never report back and count as incomplete
+    completed_tasks = 0
     while not results_queue.empty():
-        all_results.extend(results_queue.get())
+        result, completed = results_queue.get()
+        if result:
+            all_results.append(result)
+        completed_tasks += 1 if completed else 0
+
+    unique_results = sorted(set(all_results))
+
+    console.print(f"[bold green][+] All parallel tasks completed. Streamed ~{dashboard.unique_sketch.count():,} unique results.[/bold green]")
+    if completed_tasks < len(tasks):
+        console.print(f"[yellow][!] {len(tasks) - completed_tasks} of {len(tasks)} tasks did not finish successfully; their results may be incomplete.[/yellow]")
 
-    unique_results = sorted(list(set(all_results)))
-    
-    console.print(f"[bold green][+] All parallel tasks completed. Found {len(unique_results)} unique results.[/bold green]")
-    
+    if with_status:
+        return unique_results, completed_tasks == len(tasks)
     return unique_results
@@ -7,7 +7,9 @@ from rich.console import Console
 from rich.panel import Panel
 from rich.prompt import Prompt
 
-from core.orchestrator import run_subdomain_enumeration_phase, run_host_discovery_phase, run_crawling_phase, run_vuln_scanning_phase
+from core.orchestrator import run_subdomain_enumeration_phase, run_host_discovery_phase, run_crawling_phase, run_vuln_scanning_phase, archive_run_outputs
+from utils.http_cache import CachingProxy, get_cache_settings
+from utils.run_archive import get_archive_settings
 
 console = Console()
 
@@ -59,9 +61,11 @@ def create_output_directory(domain):
         console.print(f"[bold red][!] Could not create output directory: {e}[/bold red]")
         sys.exit(1)
 
-def main_menu(domain, config):
+def main_menu(domain, config, http_cache=None):
     """Displays the main interactive menu."""
     while True:
+        if http_cache:
+            http_cache.print_stats()
         console.print("\n")
         console.print(Panel.fit(f"Current Target: [bold cyan]{domain}[/bold cyan]", title="[yellow]Main Menu[/yellow]", border_style="yellow"))
         console.print("  [bold green]1.[/bold green] Quick Scan Methodology (Coming Soon)")
@@ -72,10 +76,11 @@ def main_menu(domain, config):
         console.print("  [bold cyan]5.[/bold cyan] Phase 3: Crawling & URL Gathering")
         console.print("  [bold cyan]6.[/bold cyan] Phase 4: Vulnerability Scanning")
         console.print("  [bold blue]---------------------------------------------[/bold blue]")
+        console.print("  [bold yellow]a.[/bold yellow] Archive Phase Outputs")
         console.print("  [bold yellow]u.[/bold yellow] Update Tools (Coming Soon)")
         console.print("  [bold red]0.[/bold red] Exit")
 
-        choice = Prompt.ask("\n[*] Select an option", choices=["1", "2", "3", "4", "5", "6", "u", "0"], default="2")
+        choice = Prompt.ask("\n[*] Select an option", choices=["1", "2", "3", "4", "5", "6", "a", "u", "0"], default="2")
 
         if choice == '1':
             console.print("\n[yellow][*] Quick Scan selected (Execution coming soon)...[/yellow]")
@@ -89,6 +94,8 @@ def main_menu(domain, config):
                     urls = run_crawling_phase(domain, config)
                     if urls:
                         run_vuln_scanning_phase(domain, config)
+            if get_archive_settings(config)['auto']:
+                archive_run_outputs(config)
             console.print("\n[bold magenta]*** Full Scan Workflow Complete ***[/bold magenta]")
 
         elif choice == '3':
@@ -99,6 +106,8 @@ def main_menu(domain, config):
             run_crawling_phase(domain, config)
         elif choice == '6':
             run_vuln_scanning_phase(domain, config)
+        elif choice == 'a':
+            archive_run_outputs(config)
         elif choice == '0':
             console.print("\n[bold blue][*] Goodbye![/bold blue]")
             sys.exit(0)
@@ -126,4 +135,15 @@ if __name__ == "__main__":
     output_dir = create_output_directory(args.domain)
     os.chdir(output_dir) 
 
-    main_menu(args.domain, config)
+    # Start the shared HTTP response cache, if enabled, before any tool runs
+    http_cache = None
+    if get_cache_settings(config)['enabled']:
+        http_cache = CachingProxy(config)
+        if not http_cache.start():
+            http_cache = None
+
+    try:
+        main_menu(args.domain, config, http_cache)
+    finally:
+        if http_cache:
+            http_cache.stop(stats_file="misc/http_cache_stats.json")
@@ -0,0 +1,377 @@
+# This module is responsible for discovering unlinked content (directories and files) on live hosts.
+import sys
+import os
+import json
+import ssl
+import uuid
+import hashlib
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.tool_wrapper import stream_command
+from rich.console import Console
+
+console = Console()
+
+DEFAULT_CONTENT_DISCOVERY_SETTINGS = {
+    'enabled': True,
+    # File extensions appended to every word, in addition to the bare word (e.g. [".php", ".bak"])
+    'extensions': [],
+    # Status codes reported as hits
+    'match_codes': "200-299,301,302,307,401,403,405,500",
+    # ffuf threads and requests per second (0 = unlimited)
+    'threads': 100,
+    'rate_limit': 0,
+    # Random paths requested per host during calibration
+    'calibration_probes': 3,
+    # Once a host produces this many hits it is treated as a catch-all and its further hits are dropped
+    'max_hits_per_host': 200,
+    # Maximum runtime in seconds; 0 means no limit
+    'timeout': 0,
+}
+
+CALIBRATION_FILE = "misc/content_discovery_calibration.json"
+HOSTS_FILE = "misc/content_discovery_hosts.txt"
+WORDS_FILE = "misc/content_discovery_words.txt"
+
+
+def get_content_discovery_settings(config):
+    """
+    Returns the content discovery settings, with config.yaml values overriding the defaults.
+
+    Args:
+        config (dict): The configuration dictionary.
+
+    Returns:
+        dict: The merged content discovery settings.
+    """
+    settings = dict(DEFAULT_CONTENT_DISCOVERY_SETTINGS)
+    settings.update(config.get('content_discovery') or {})
+    return settings
+
+
+def probe_path(base_url, path, timeout):
+    """
+    Requests a single path without following redirects and fingerprints the response.
+
+    Args:
+        base_url (str): The host's base URL (e.g. "https://app.example.com:8443").
+        path (str): The path to request, including the random token.
+        timeout (int): Network timeout in seconds.
+
+    Returns:
+        dict: The response fingerprint (status, size, words, lines and body hash), or None on error.
+    """
+    parsed = urlsplit(base_url)
+    try:
+        if parsed.scheme == "https":
+            conn = http.client.HTTPSConnection(parsed.hostname, parsed.port, timeout=timeout,
+                                               context=ssl._create_unverified_context())
+        else:
+            conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=timeout)
+        conn.request("GET", path, headers={'User-Agent': "Mozilla/5.0", 'Connection': "close"})
+        response = conn.getresponse()
+        body = response.read(1024 * 1024)
+        conn.close()
+    except (OSError, http.client.HTTPException, ValueError):
+        return None
+
+    # Pages often reflect the requested path; strip it so the hash only reflects the template
+    token = path.strip('/').split('.')[0].encode()
+    normalized = body.replace(token, b"")
+    # Words and lines are counted the way ffuf counts them (splitting on spaces and on
+    # newlines only, so an empty body is 1 word and 1 line); otherwise the signatures
+    # would never match the 'words' and 'lines' fields of its JSON records
+    return {
+        'status': response.status,
+        'size': len(body),
+        'words': body.count(b" ") + 1,
+        'lines': body.count(b"\n") + 1,
+        'hash': hashlib.md5(normalized).hexdigest(),
+    }
+
+
+def calibrate_host(base_url, settings, timeout):
+    """
+    Requests random, non-existent paths on a host to learn how it answers for missing content.
+
+    Classification:
+        normal      - missing paths return 404 (or another status outside match_codes); fuzz as-is.
+        soft404     - missing paths return a matching status with a stable page; fuzz, but drop
+                      hits matching that page's signature.
+        catch-all   - missing paths return matching statuses with varying pages that cannot be
+                      filtered; the host is skipped.
+        unreachable - the host did not answer; the host is skipped.
+
+    Args:
+        base_url (str): The host's base URL.
+        settings (dict): The content discovery settings.
+        timeout (int): Network timeout in seconds.
+
+    Returns:
+        dict: The host's classification and the signatures of its soft-404 responses.
+    """
+    probe_paths = []
+    for index in range(settings['calibration_probes']):
+        token = uuid.uuid4().hex
+        # Vary the shape of the path, as some servers only catch files or only directories
+        probe_paths.append(["/{}", "/{}/", "/{}.html"][index % 3].format(token))
+
+    fingerprints = [fp for fp in (probe_path(base_url, path, timeout) for path in probe_paths) if fp]
+    if not fingerprints:
+        return {'classification': "unreachable", 'signatures': []}
+
+    match_codes = parse_status_codes(settings['match_codes'])
+    matching = [fp for fp in fingerprints if fp['status'] in match_codes]
+    if not matching:
+        return {'classification': "normal", 'signatures': []}
+
+    # Size/hash agreement means the soft-404 page is stable enough to be filtered out
+    if len({fp['hash'] for fp in matching}) == 1 or len({(fp['status'], fp['words'], fp['lines']) for fp in matching}) == 1:
+        signatures = sorted({(fp['status'], fp['words'], fp['lines']) for fp in matching})
+        return {'classification': "soft404", 'signatures': [list(signature) for signature in signatures]}
+    return {'classification': "catch-all", 'signatures': []}
+
+
+def parse_status_codes(codes):
+    """Expands a status code list such as "200-299,301,403" into a set of integers."""
+    result = set()
+    for part in str(codes).split(','):
+        part = part.strip()
+        if '-' in part:
+            start, end = part.split('-', 1)
+            result.update(range(int(start), int(end) + 1))
+        elif part:
+            result.add(int(part))
+    return result
+
+
+def calibrate_hosts(hosts, config):
+    """
+    Calibrates all hosts concurrently.
+
+    Args:
+        hosts (list): Base URLs of the live hosts.
+        config (dict): The configuration dictionary.
+
+    Returns:
+        dict: Calibration results keyed by base URL.
+    """
+    settings = get_content_discovery_settings(config)
+    timeout = config.get('settings', {}).get('timeout', 10)
+    threads = config.get('settings', {}).get('threads', 50)
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = executor.map(lambda host: calibrate_host(host, settings, timeout), hosts)
+        return dict(zip(hosts, results))
+
+
+def load_base_urls(input_file):
+    """Reads live hosts and reduces them to unique base URLs (scheme://host[:port])."""
+    base_urls = []
+    seen = set()
+    with open(input_file, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if '://' not in line:
+                line = f"http://{line}"
+            parsed = urlsplit(line)
+            if not parsed.netloc:
+                continue
+            base_url = f"{parsed.scheme}://{parsed.netloc.lower()}"
+            if base_url not in seen:
+                seen.add(base_url)
+                base_urls.append(base_url)
+    return base_urls
+
+
+def write_fuzz_inputs(hosts, wordlist_path, hosts_file, words_file):
+    """
+    Writes the two wordlists ffuf combines: the hosts to fuzz and the cleaned words
+    (comments, blank lines and words containing whitespace dropped, leading slashes
+    removed). The wordlist is copied line by line, so it is never held in memory.
+
+    Args:
+        hosts (list): Base URLs of the hosts to fuzz.
+        wordlist_path (str): Path to the fuzzing wordlist.
+        hosts_file (str): Where the host list is written.
+        words_file (str): Where the cleaned word list is written.
+
+    Returns:
+        int: The number of words written.
+    """
+    os.makedirs(os.path.dirname(hosts_file), exist_ok=True)
+    with open(hosts_file, 'w') as f:
+        for host in hosts:
+            f.write(f"{host}\n")
+
+    words = 0
+    with open(wordlist_path, 'r', errors='ignore') as f, open(words_file, 'w') as out:
+        for line in f:
+            word = line.strip().lstrip('/')
+            if not word or word.startswith('#') or any(char.isspace() for char in word):
+                continue
+            out.write(f"{word}\n")
+            words += 1
+    return words
+
+
+class ContentHitFilter:
+    """
+    Turns ffuf's JSON output lines into hit URLs, dropping responses that match a
+    host's soft-404 signature and capping the number of hits per host.
+    """
+
+    def __init__(self, calibrations, max_hits_per_host):
+        self.signatures = {host: {tuple(sig) for sig in result['signatures']} for host, result in calibrations.items()}
+        self.max_hits_per_host = max_hits_per_host
+        self.hits_per_host = {}
+        self.capped_hosts = set()
+
+    def __call__(self, line):
+        try:
+            record = json.loads(line)
+            url = record['url']
+            signature = (int(record['status']), int(record['words']), int(record['lines']))
+        except (ValueError, KeyError, TypeError):
+            return None
+
+        parsed = urlsplit(url)
+        host = f"{parsed.scheme}://{parsed.netloc.lower()}"
+        if signature in self.signatures.get(host, ()):
+            return None
+
+        hits = self.hits_per_host.get(host, 0) + 1
+        self.hits_per_host[host] = hits
+        if hits > self.max_hits_per_host:
+            if host not in self.capped_hosts:
+                self.capped_hosts.add(host)
+                console.print(f"[yellow][!] {host} returned more than {self.max_hits_per_host} hits; treating it as a catch-all and dropping further hits.[/yellow]")
+            return None
+        return url
+
+
+def run_content_discovery(input_file, config):
+    """
+    Runs directory and file fuzzing over the live hosts with the configured wordlist.
+    Each host is calibrated first so catch-all hosts are skipped and soft-404 pages
+    are filtered; the remaining hosts are fuzzed by ffuf with requests interleaved
+    across hosts. Saves hits directly to a file.
+
+    Args:
+        input_file (str): Path to the file containing live hosts.
+        config (dict): The configuration dictionary.
+
+    Returns:
+        str: Path to the output file if successful, None otherwise.
+    """
+    settings = get_content_discovery_settings(config)
+    if not settings['enabled']:
+        return None
+    wordlist_path = (config.get('wordlists') or {}).get('fuzzing')
+    if not wordlist_path or not os.path.exists(wordlist_path):
+        console.print(f"[yellow][!] Fuzzing wordlist '{wordlist_path}' not found. Skipping content discovery.[/yellow]")
+        return None
+
+    console.print(f"[yellow][*] Running content discovery on {input_file}...[/yellow]")
+    output_file = "urls/fuzzing_raw.txt" # Specific output file for content discovery
+
+    hosts = load_base_urls(input_file)
+    calibrations = calibrate_hosts(hosts, config)
+    try:
+        os.makedirs(os.path.dirname(CALIBRATION_FILE), exist_ok=True)
+        with open(CALIBRATION_FILE, 'w') as f:
+            json.dump(calibrations, f, indent=2)
+    except OSError as e:
+        console.print(f"[yellow][!] Warning: Could not save calibration results: {e}[/yellow]")
+
+    fuzz_hosts = [host for host in hosts if calibrations[host]['classification'] in ("normal", "soft404")]
+    skipped = len(hosts) - len(fuzz_hosts)
+    console.print(f"[cyan][*] Calibration: {len(fuzz_hosts)} hosts to fuzz, {skipped} skipped (catch-all or unreachable).[/cyan]")
+    if not fuzz_hosts:
+        return None
+
+    words_count = write_fuzz_inputs(fuzz_hosts, wordlist_path, HOSTS_FILE, WORDS_FILE)
+    console.print(f"[cyan][*] Fuzzing {len(fuzz_hosts)} hosts with {words_count} words.[/cyan]")
+
+    # ffuf combines the two wordlists itself (clusterbomb), so only the hosts and the words are
+    # held in memory, never their product. The first wordlist is the inner loop, so consecutive
+    # requests go to different hosts and the load is spread evenly. -e: extra extensions for each
+    # word, -json: one record per hit on stdout
+    timeout = config.get('settings', {}).get('timeout', 10)
+    command = (f"ffuf -w {HOSTS_FILE}:HOST -w {WORDS_FILE}:FUZZ -u HOST/FUZZ -mode clusterbomb -s -json"
+               f" -t {settings['threads']} -timeout {timeout} -mc {settings['match_codes']}")
+    if settings['extensions']:
+        command += f" -e {','.join(settings['extensions'])}"
+    if settings['rate_limit']:
+        command += f" -rate {settings['rate_limit']}"
+
+    hit_filter = ContentHitFilter(calibrations, settings['max_hits_per_host'])
+    try:
+        hits_count = stream_command(
+            command, output_file, label="ffuf (content discovery)",
+            timeout=settings['timeout'] or None,
+            line_filter=hit_filter,
+        )
+    finally:
+        # The cleaned copy can be as large as the wordlist itself
+        if os.path.exists(WORDS_FILE):
+            os.remove(WORDS_FILE)
+
+    if hits_count:
+        console.print(f"[bold green][+] Content discovery complete. Found {hits_count} URLs. Results saved to {output_file}[/bold green]")
+        return output_file
+    else:
+        console.print("[yellow][!] Content discovery completed, but no content was found or output file is empty.[/yellow]")
+        return None
+
+
+# This is a main block for testing this module individually
+if __name__ == '__main__':
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    # A local server answering every missing path with a 200 soft-404 page (nginx-style
+    # markup, reflecting the requested path) and serving one real page at /admin
+    class SoftNotFoundHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/admin":
+                body = b"<html>\n<body>\n<h1>Admin console</h1>\n<form>Login to continue</form>\n</body>\n</html>\n"
+            else:
+                body = (f"<html>\r\n<head><title>Page not found</title></head>\r\n<body>\r\n"
+                        f"<center><h1>{self.path} was not found</h1></center>\r\n<hr><center>nginx</center>\r\n"
+                        f"</body>\r\n</html>\r\n").encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SoftNotFoundHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    test_host = f"http://127.0.0.1:{server.server_address[1]}"
+
+    console.print(f"[bold blue]--- Running Test for content_discovery.py ---[/bold blue]")
+    calibrations = calibrate_hosts([test_host], {})
+    result = calibrations[test_host]
+    console.print(f"{test_host}: {result['classification']} {result['signatures']}")
+    assert result['classification'] == "soft404", result
+
+    # Feed the filter records shaped like ffuf's -json output, with words and lines counted as ffuf does
+    hit_filter = ContentHitFilter(calibrations, 200)
+    for path, expected_hit in [("/backup.zip", False), ("/some/missing/dir", False), ("/admin", True)]:
+        url = f"{test_host}{path}"
+        fingerprint = probe_path(test_host, path, 5)
+        record = {'url': url, 'status': fingerprint['status'], 'length': fingerprint['size'],
+                  'words': fingerprint['words'], 'lines': fingerprint['lines']}
+        kept = hit_filter(json.dumps(record)) is not None
+        console.print(f"{url}: {'hit' if kept else 'filtered'}")
+        assert kept == expected_hit, record
+
+    server.shutdown()
+    console.print("[bold green][+] Soft-404 responses filtered, real content kept.[/bold green]")
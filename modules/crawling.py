@@ -3,7 +3,8 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.tool_wrapper import run_command
+from utils.tool_wrapper import stream_command
+from utils.http_cache import get_proxy_url
 from rich.console import Console
 
 console = Console()
@@ -24,17 +25,18 @@ def run_katana(input_file, config):
     output_file = "urls/katana_raw.txt" # Define a specific output file for Katana
     
     # Using flags from the reference bash script: -jc (javascript parsing), -d 2 (crawl depth)
-    # Directing output to the specified file using -o flag
-    command = f"katana -list {input_file} -silent -jc -d 2 -o {output_file}"
+    # Results are streamed from stdout into output_file
+    command = f"katana -list {input_file} -silent -jc -d 2"
+
+    # Route requests through the shared response cache if it is enabled
+    proxy_url = get_proxy_url(config)
+    if proxy_url:
+        command += f" -proxy {proxy_url}"
     
-    # run_command will execute the command. We don't need its stdout directly here
-    # because Katana writes to the file. We just check if the command ran.
-    run_command(command) 
+    # stream_command writes each URL to the file as Katana prints it and reports live progress
+    urls_count = stream_command(command, output_file, label="katana") 
     
-    # Check if the output file was created and has content
-    if os.path.exists(output_file) and os.path.getsize(output_file) > 0:
-        with open(output_file, 'r') as f:
-            urls_count = len(f.readlines())
+    if urls_count:
         console.print(f"[bold green][+] Katana scan complete. Found {urls_count} URLs. Results saved to {output_file}[/bold green]")
         return output_file # Return the path to the file
     else:
@@ -45,7 +47,8 @@ def run_katana(input_file, config):
 def run_gau(input_file, config):
     """
     Runs GAU (Get All URLs) to fetch historical URLs from multiple providers.
-    This version reads the file and passes its content to stdin, then redirects stdout to a file.
+    The hosts file is fed to gau's stdin and its output is streamed, line by line,
+    into urls/gau_raw.txt while progress is reported to the dashboard.
 
     Args:
         input_file (str): Path to the file containing live hosts.
@@ -58,8 +61,8 @@ def run_gau(input_file, config):
     output_file = "urls/gau_raw.txt" # Define a specific output file for GAU
     
     # The '-t' flag for threads has been removed as it's deprecated in newer versions of gau.
-    # We will pipe the input_file content to gau and redirect gau's stdout to output_file
-    command = f"gau > {output_file}" # GAU will read from stdin and write to output_file
+    # We will pipe the input_file content to gau and stream gau's stdout into output_file
+    command = "gau" # GAU will read from stdin
     
     try:
         with open(input_file, 'r') as f:
@@ -69,14 +72,9 @@ def run_gau(input_file, config):
         return None
 
     # Pass the file content to the command's standard input
-    # run_command will execute the command. We don't need its stdout directly here
-    # because GAU writes to the file. We just check if the command ran.
-    run_command(command, stdin_data=input_content)
+    urls_count = stream_command(command, output_file, label="gau", stdin_data=input_content)
     
-    # Check if the output file was created and has content
-    if os.path.exists(output_file) and os.path.getsize(output_file) > 0:
-        with open(output_file, 'r') as f:
-            urls_count = len(f.readlines())
+    if urls_count:
         console.print(f"[bold green][+] GAU scan complete. Found {urls_count} URLs. Results saved to {output_file}[/bold green]")
         return output_file # Return the path to the file
     else:
@@ -3,7 +3,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.tool_wrapper import run_command
+from utils.tool_wrapper import stream_command
 from rich.console import Console
 
 console = Console()
@@ -23,20 +23,19 @@ def run_httpx(input_file, config):
     console.print(f"[yellow][*] Running HTTPX on {input_file}...[/yellow]")
     output_file = "hosts/httpx_live_raw.txt" # Specific output file for HTTPX
     
-    # -silent: show only results. -threads: for speed.
+    # -silent: show only results. -threads: for speed. -nc: plain stdout, as results are streamed to a file
     threads = config.get('settings', {}).get('threads', 50)
     # Define common web ports to scan
     common_ports = "80,443,8080,8000,8888,8443,3000,5000,9000" # You can extend this list
     
-    # Construct the command with explicit ports, directing output to the specified file
-    command = f"httpx -l {input_file} -silent -threads {threads} -ports {common_ports} -o {output_file}"
+    # Construct the command with explicit ports; results are streamed from stdout into output_file
+    # httpx never goes through the shared response cache: liveness has to be probed directly,
+    # as any answer from a proxy would make a dead host look live
+    command = f"httpx -l {input_file} -silent -threads {threads} -ports {common_ports} -nc"
     
-    run_command(command) # Execute the command
+    live_hosts_count = stream_command(command, output_file, label="httpx") # Execute the command
     
-    # Check if the output file was created and has content
-    if os.path.exists(output_file) and os.path.getsize(output_file) > 0:
-        with open(output_file, 'r') as f:
-            live_hosts_count = len(f.readlines())
+    if live_hosts_count:
         console.print(f"[bold green][+] HTTPX scan complete. Found {live_hosts_count} live hosts. Results saved to {output_file}[/bold green]")
         return output_file # Return the path to the file
     else:
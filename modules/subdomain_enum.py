@@ -3,9 +3,12 @@
 # We need to adjust the Python path to be able to import from the parent directory
 import sys
 import os
+import re
+import itertools
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.tool_wrapper import run_command
+from utils.tool_wrapper import stream_command
+from utils.bloom_filter import BloomFilter
 from rich.console import Console
 
 console = Console()
@@ -24,13 +27,11 @@ def run_subfinder(domain, config):
     """
     console.print(f"[yellow][*] Running Subfinder for {domain}...[/yellow]")
     output_file = "subs/subfinder_raw.txt" # Specific output file for Subfinder
-    command = f"subfinder -d {domain} -silent -o {output_file}" # Use -o for direct output
+    command = f"subfinder -d {domain} -silent" # Results are streamed from stdout into output_file
     
-    run_command(command) # Execute the command
+    subdomains_count = stream_command(command, output_file, label="subfinder") # Execute the command
     
-    if os.path.exists(output_file) and os.path.getsize(output_file) > 0:
-        with open(output_file, 'r') as f:
-            subdomains_count = len(f.readlines())
+    if subdomains_count:
         console.print(f"[bold green][+] Subfinder scan complete. Found {subdomains_count} subdomains. Results saved to {output_file}[/bold green]")
         return output_file
     else:
@@ -51,13 +52,11 @@ def run_assetfinder(domain, config):
     """
     console.print(f"[yellow][*] Running Assetfinder for {domain}...[/yellow]")
     output_file = "subs/assetfinder_raw.txt" # Specific output file for Assetfinder
-    command = f"assetfinder --subs-only {domain} > {output_file}" # Redirect output to file
+    command = f"assetfinder --subs-only {domain}" # Results are streamed from stdout into output_file
     
-    run_command(command)
+    subdomains_count = stream_command(command, output_file, label="assetfinder")
     
-    if os.path.exists(output_file) and os.path.getsize(output_file) > 0:
-        with open(output_file, 'r') as f:
-            subdomains_count = len(f.readlines())
+    if subdomains_count:
         console.print(f"[bold green][+] Assetfinder scan complete. Found {subdomains_count} subdomains. Results saved to {output_file}[/bold green]")
         return output_file
     else:
@@ -78,17 +77,13 @@ def run_findomain(domain, config):
     """
     console.print(f"[yellow][*] Running Findomain for {domain}...[/yellow]")
     output_file = "subs/findomain_raw.txt" # Specific output file for Findomain
-    # The -q flag makes findomain quiet, and -o for output file
-    command = f"findomain -t {domain} -q -o {output_file}" 
+    # The -q flag makes findomain quiet so only results are printed to stdout,
+    # which is streamed into output_file (this also avoids findomain's own file naming).
+    command = f"findomain -t {domain} -q" 
     
-    run_command(command)
+    subdomains_count = stream_command(command, output_file, label="findomain")
     
-    # Findomain might save to a file named after the domain, so we need to check that.
-    # A more robust approach might be to ensure findomain saves to the exact output_file.
-    # For now, assuming -o flag works as expected to the specified path.
-    if os.path.exists(output_file) and os.path.getsize(output_file) > 0:
-        with open(output_file, 'r') as f:
-            subdomains_count = len(f.readlines())
+    if subdomains_count:
         console.print(f"[bold green][+] Findomain scan complete. Found {subdomains_count} subdomains. Results saved to {output_file}[/bold green]")
         return output_file
     else:
@@ -96,6 +91,324 @@ def run_findomain(domain, config):
         return None
 
 
+# --- Active enumeration: wordlist bruteforce and permutations ---
+
+DEFAULT_BRUTEFORCE_SETTINGS = {
+    'enabled': True,
+    'permutations': True,
+    # Words combined with already-known names (env prefixes and common service names)
+    'permutation_words': ["dev", "development", "stage", "staging", "test", "qa", "uat", "prod",
+                          "preprod", "sandbox", "demo", "beta", "internal", "int", "old", "new",
+                          "api", "admin", "v1", "v2"],
+    # Numbers found in known names are incremented/decremented by up to this amount
+    'number_range': 3,
+    'batch_size': 10000,
+    # Used to size the candidate deduplication filter
+    'expected_candidates': 10000000,
+    'dedup_error_rate': 0.001,
+    # dnsx settings
+    'threads': 100,
+    'rate_limit': 0,
+    'resolvers': "",
+    # Maximum runtime in seconds; 0 means no limit
+    'timeout': 0,
+}
+
+# Files written by the passive tools; their names seed the permutation stage
+PASSIVE_OUTPUT_FILES = ["subs/subfinder_raw.txt", "subs/assetfinder_raw.txt", "subs/findomain_raw.txt"]
+
+# Names resolved by the streaming pass, before wildcard filtering
+RESOLVED_FILE = "subs/bruteforce_resolved_raw.txt"
+FILTERED_BATCH_FILE = "subs/bruteforce_filtered_batch.txt"
+# dnsx -wd holds its whole input until it has checked the wildcards, so it is fed in batches.
+# On a wildcard zone nearly every candidate resolves, so the resolved list can be large
+WILDCARD_FILTER_BATCH = 100000
+
+LABEL_PATTERN = re.compile(r'^[a-z0-9_](?:[a-z0-9_-]{0,61}[a-z0-9_])?$')
+NUMBER_PATTERN = re.compile(r'\d+')
+
+
+def get_bruteforce_settings(config):
+    """
+    Returns the bruteforce settings, with config.yaml values overriding the defaults.
+
+    Args:
+        config (dict): The configuration dictionary.
+
+    Returns:
+        dict: The merged bruteforce settings.
+    """
+    settings = dict(DEFAULT_BRUTEFORCE_SETTINGS)
+    settings.update(config.get('subdomain_bruteforce') or {})
+    return settings
+
+
+def is_valid_hostname(hostname):
+    """Checks that every label of a hostname is a valid DNS label."""
+    return len(hostname) <= 253 and all(LABEL_PATTERN.match(label) for label in hostname.split('.'))
+
+
+def load_known_subdomains(domain, file_paths):
+    """
+    Reads the subdomains already found by the passive tools.
+
+    Args:
+        domain (str): The target domain.
+        file_paths (list): Paths of the passive tools' output files.
+
+    Returns:
+        set: The known subdomains of the target domain, lowercased.
+    """
+    suffix = f".{domain.lower()}"
+    known = set()
+    for file_path in file_paths:
+        if not os.path.exists(file_path):
+            continue
+        with open(file_path, 'r') as f:
+            for line in f:
+                name = line.strip().lower().rstrip('.')
+                if name.endswith(suffix):
+                    known.add(name)
+    return known
+
+
+def generate_wordlist_candidates(wordlist_path, domain):
+    """
+    Yields "<word>.<domain>" for every usable entry of the wordlist, reading it lazily.
+
+    Args:
+        wordlist_path (str): Path to the subdomain wordlist.
+        domain (str): The target domain.
+
+    Yields:
+        str: Candidate hostnames.
+    """
+    suffix = f".{domain.lower()}"
+    with open(wordlist_path, 'r', errors='ignore') as f:
+        for line in f:
+            word = line.strip().lower().rstrip('.')
+            if not word or word.startswith('#'):
+                continue
+            if word.endswith(suffix):
+                word = word[:-len(suffix)]
+            yield f"{word}{suffix}"
+
+
+def generate_permutation_candidates(known_subdomains, domain, words, number_range):
+    """
+    Yields alterations of already-known subdomains: words prepended or appended to
+    the first label, numbers incremented/decremented, and environment words swapped
+    or removed (e.g. "dev-api" -> "staging-api", "api").
+
+    Args:
+        known_subdomains (iterable): Known subdomains of the target domain.
+        domain (str): The target domain.
+        words (list): Words used for the alterations.
+        number_range (int): How far numbers are incremented/decremented.
+
+    Yields:
+        str: Candidate hostnames (may contain duplicates).
+    """
+    suffix = f".{domain.lower()}"
+    word_set = set(words)
+    for name in known_subdomains:
+        prefix = name[:-len(suffix)]
+        if not prefix:
+            continue
+        first, _, rest = prefix.partition('.')
+        rest = f".{rest}" if rest else ""
+
+        for word in words:
+            yield f"{word}.{prefix}{suffix}"
+            yield f"{word}-{first}{rest}{suffix}"
+            yield f"{first}-{word}{rest}{suffix}"
+            yield f"{first}{word}{rest}{suffix}"
+
+        # api2 -> api1, api3, ...; web01 -> web02 (zero padding is preserved)
+        for match in NUMBER_PATTERN.finditer(first):
+            number = int(match.group())
+            for delta in range(-number_range, number_range + 1):
+                if delta == 0 or number + delta < 0:
+                    continue
+                replacement = str(number + delta).zfill(len(match.group()))
+                yield f"{first[:match.start()]}{replacement}{first[match.end():]}{rest}{suffix}"
+
+        # dev-api -> api, staging-api, ...
+        parts = first.split('-')
+        for index, part in enumerate(parts):
+            if part not in word_set:
+                continue
+            remaining = parts[:index] + parts[index + 1:]
+            if remaining:
+                yield f"{'-'.join(remaining)}{rest}{suffix}"
+            for word in words:
+                if word != part:
+                    yield f"{'-'.join(parts[:index] + [word] + parts[index + 1:])}{rest}{suffix}"
+
+
+def generate_candidate_batches(candidate_sources, known_subdomains, settings, stats):
+    """
+    Deduplicates candidates in batches and yields them as newline-joined chunks
+    ready to be written to the resolver's stdin.
+
+    Candidates are checked against the known names first, then against a Bloom
+    filter, so memory stays bounded no matter how many candidates are generated.
+
+    Args:
+        candidate_sources (list): Iterables of candidate hostnames.
+        known_subdomains (set): Names that are already known and need no resolving.
+        settings (dict): The bruteforce settings.
+        stats (dict): Counters updated in place ('generated', 'invalid', 'known', 'duplicates', 'queued').
+
+    Yields:
+        str: A chunk of candidate hostnames, one per line.
+    """
+    seen = BloomFilter(settings['expected_candidates'], settings['dedup_error_rate'])
+    batch_size = settings['batch_size']
+    for source in candidate_sources:
+        iterator = iter(source)
+        while True:
+            batch = list(itertools.islice(iterator, batch_size))
+            if not batch:
+                break
+            stats['generated'] += len(batch)
+            valid = [name for name in batch if is_valid_hostname(name)]
+            stats['invalid'] += len(batch) - len(valid)
+            unknown = [name for name in valid if name not in known_subdomains]
+            stats['known'] += len(valid) - len(unknown)
+            new = seen.filter_new(unknown)
+            stats['duplicates'] += len(unknown) - len(new)
+            stats['queued'] += len(new)
+            if new:
+                yield "\n".join(new) + "\n"
+
+
+def generate_file_batches(file_path, batch_size):
+    """
+    Yields the lines of a file in newline-joined chunks of at most batch_size lines.
+
+    Args:
+        file_path (str): The file to read.
+        batch_size (int): Maximum number of lines per chunk.
+
+    Yields:
+        str: A chunk of lines.
+    """
+    batch = []
+    with open(file_path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            batch.append(line)
+            if len(batch) >= batch_size:
+                yield "\n".join(batch) + "\n"
+                batch = []
+    if batch:
+        yield "\n".join(batch) + "\n"
+
+
+def filter_wildcard_answers(domain, settings, input_file, output_file):
+    """
+    Drops names that only resolved because of wildcard DNS, running dnsx -wd over
+    the resolved names in batches of WILDCARD_FILTER_BATCH lines.
+
+    Args:
+        domain (str): The target domain.
+        settings (dict): The bruteforce settings.
+        input_file (str): The names resolved by the streaming pass.
+        output_file (str): Where the names that survive the filter are written.
+
+    Returns:
+        int: The number of names written.
+    """
+    command = f"dnsx -silent -t {settings['threads']} -wd {domain}"
+    if settings['rate_limit']:
+        command += f" -rl {settings['rate_limit']}"
+    if settings['resolvers']:
+        command += f" -r {settings['resolvers']}"
+
+    kept = 0
+    with open(output_file, 'w') as out:
+        for batch in generate_file_batches(input_file, WILDCARD_FILTER_BATCH):
+            if stream_command(command, FILTERED_BATCH_FILE, label="dnsx (wildcard filter)", stdin_data=batch) is None:
+                break
+            with open(FILTERED_BATCH_FILE, 'r') as f:
+                for line in f:
+                    out.write(line)
+                    kept += 1
+    if os.path.exists(FILTERED_BATCH_FILE):
+        os.remove(FILTERED_BATCH_FILE)
+    return kept
+
+
+def run_subdomain_bruteforce(domain, config):
+    """
+    Runs the active enumeration stage: candidates from the configured wordlist and
+    from permutations of the names found by the passive tools are deduplicated and
+    streamed into dnsx, which resolves them as they arrive. The resolved names then
+    go through a second, much smaller dnsx pass that filters wildcard answers.
+    Saves output directly to a file.
+
+    Args:
+        domain (str): The target domain.
+        config (dict): The configuration dictionary.
+
+    Returns:
+        str: Path to the output file if successful, None otherwise.
+    """
+    settings = get_bruteforce_settings(config)
+    if not settings['enabled']:
+        return None
+    console.print(f"[yellow][*] Running subdomain bruteforce and permutations for {domain}...[/yellow]")
+    output_file = "subs/bruteforce_raw.txt" # Specific output file for the active stage
+
+    known_subdomains = load_known_subdomains(domain, PASSIVE_OUTPUT_FILES)
+    candidate_sources = []
+    wordlist_path = (config.get('wordlists') or {}).get('subdomains')
+    if wordlist_path and os.path.exists(wordlist_path):
+        candidate_sources.append(generate_wordlist_candidates(wordlist_path, domain))
+    else:
+        console.print(f"[yellow][!] Subdomain wordlist '{wordlist_path}' not found. Skipping wordlist bruteforce.[/yellow]")
+    if settings['permutations'] and known_subdomains:
+        candidate_sources.append(generate_permutation_candidates(
+            sorted(known_subdomains), domain, settings['permutation_words'], settings['number_range']
+        ))
+    if not candidate_sources:
+        console.print("[yellow][!] No bruteforce candidates to resolve.[/yellow]")
+        return None
+
+    # -stream: resolve names as they arrive on stdin instead of reading all of it first, and print
+    # each answer at once. Stream mode disables dnsx's wildcard filter, which runs as a second pass
+    command = f"dnsx -silent -stream -t {settings['threads']}"
+    if settings['rate_limit']:
+        command += f" -rl {settings['rate_limit']}"
+    if settings['resolvers']:
+        command += f" -r {settings['resolvers']}"
+
+    stats = {'generated': 0, 'invalid': 0, 'known': 0, 'duplicates': 0, 'queued': 0}
+    candidates = generate_candidate_batches(candidate_sources, known_subdomains, settings, stats)
+    # On timeout the names resolved so far are kept and still filtered
+    resolved_count = stream_command(
+        command, RESOLVED_FILE, label="dnsx (bruteforce)",
+        timeout=settings['timeout'] or None, stdin_data=candidates
+    )
+
+    console.print(
+        f"[cyan][*] Bruteforce candidates: {stats['generated']} generated, {stats['queued']} sent to dnsx, "
+        f"{stats['known']} already known, {stats['duplicates']} duplicates, {stats['invalid']} invalid.[/cyan]"
+    )
+    if resolved_count:
+        resolved_count = filter_wildcard_answers(domain, settings, RESOLVED_FILE, output_file)
+        console.print(f"[cyan][*] Wildcard filter kept {resolved_count} resolved names.[/cyan]")
+    if resolved_count:
+        console.print(f"[bold green][+] Bruteforce complete. Found {resolved_count} subdomains. Results saved to {output_file}[/bold green]")
+        return output_file
+    else:
+        console.print("[yellow][!] Bruteforce completed, but no new subdomains were resolved.[/yellow]")
+        return None
+
+
 # This is a main block for testing this module individually
 if __name__ == '__main__':
     test_domain = "example.com"
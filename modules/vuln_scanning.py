@@ -1,43 +1,260 @@
 # This module is responsible for running various vulnerability scanning tools.
 import sys
 import os
+import re
+from urllib.parse import urlsplit, parse_qsl
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.tool_wrapper import run_command
+from utils.tool_wrapper import stream_command
+from utils.http_cache import get_proxy_url
+from utils.url_utils import normalize_origin, url_hostname
 from rich.console import Console
 
 console = Console()
 
-def run_nuclei(input_file, config):
+# Default template sets for the two nuclei passes. The host-level pass runs nuclei's
+# standard template set (which leaves out DAST templates) once per origin, while the
+# URL-level (DAST) templates only make sense on URLs that actually carry parameters to fuzz.
+DEFAULT_NUCLEI_SETTINGS = {
+    'host_scan': {
+        # Empty means nuclei's full default template set
+        'templates': [],
+        # Templates or directories skipped with -et
+        'exclude_templates': [],
+        'concurrency': 25,
+        'bulk_size': 50,
+    },
+    'url_scan': {
+        'templates': [],
+        'dast': True,
+        'concurrency': 50,
+        'bulk_size': 25,
+    },
+}
+
+# Matches a nuclei result line: "[template-id] [protocol] [severity] matched-url ..."
+NUCLEI_RESULT_PATTERN = re.compile(r'^\[([^\]]+)\]\s+(?:\[[^\]]*\]\s+)*(\S+)')
+
+
+def get_nuclei_settings(config, scan_type):
+    """
+    Returns the nuclei settings for a scan pass, with config.yaml values
+    overriding the defaults.
+
+    Args:
+        config (dict): The configuration dictionary.
+        scan_type (str): Either 'host_scan' or 'url_scan'.
+
+    Returns:
+        dict: The merged settings for the requested pass.
+    """
+    settings = dict(DEFAULT_NUCLEI_SETTINGS[scan_type])
+    settings.update((config.get('nuclei') or {}).get(scan_type) or {})
+    return settings
+
+
+def prepare_host_targets(live_hosts_file, output_file):
+    """
+    Reduces a list of live hosts to their unique origins (scheme://host:port).
+
+    Args:
+        live_hosts_file (str): Path to the file containing live hosts.
+        output_file (str): Path where the deduplicated origins are written.
+
+    Returns:
+        int: The number of unique origins written.
     """
-    Runs Nuclei to scan for vulnerabilities.
+    origins = set()
+    with open(live_hosts_file, 'r') as f:
+        for line in f:
+            # Default ports are dropped so https://host and https://host:443 are scanned once
+            origin = normalize_origin(line)
+            if origin:
+                origins.add(origin)
+
+    with open(output_file, 'w') as f:
+        for origin in sorted(origins):
+            f.write(f"{origin}\n")
+    return len(origins)
+
+
+def prepare_url_targets(urls_file, output_file):
+    """
+    Keeps only parameterized URLs, collapsing URLs that differ only in their
+    parameter values (same host, path and parameter names) into a single entry.
+
+    Args:
+        urls_file (str): Path to the file containing crawled URLs.
+        output_file (str): Path where the selected URLs are written.
+
+    Returns:
+        int: The number of URLs written.
+    """
+    seen = set()
+    count = 0
+    with open(urls_file, 'r') as f, open(output_file, 'w') as out:
+        for line in f:
+            url = line.strip()
+            if not url:
+                continue
+            parsed = urlsplit(url)
+            if not parsed.netloc or not parsed.query:
+                continue
+            param_names = tuple(sorted({name for name, _ in parse_qsl(parsed.query, keep_blank_values=True)}))
+            if not param_names:
+                continue
+            key = (parsed.scheme, parsed.netloc.lower(), parsed.path, param_names)
+            if key in seen:
+                continue
+            seen.add(key)
+            out.write(f"{url}\n")
+            count += 1
+    return count
+
+
+def run_nuclei(input_file, config, scan_type, output_file):
+    """
+    Runs Nuclei with the template set and concurrency configured for a scan pass.
     Saves output directly to a file.
 
     Args:
-        input_file (str): Path to the file containing URLs to scan.
+        input_file (str): Path to the file containing targets to scan.
         config (dict): The configuration dictionary.
+        scan_type (str): Either 'host_scan' or 'url_scan'.
+        output_file (str): Path to the file Nuclei should write its results to.
 
     Returns:
         str: Path to the output file if successful, None otherwise.
     """
-    console.print(f"[yellow][*] Running Nuclei on {input_file}...[/yellow]")
-    output_file = "vulns/nuclei_results.txt" # Specific output file for Nuclei
-    
-    # -c: concurrency, -bs: batch size for performance
-    # -o: output file
-    command = f"nuclei -l {input_file} -c 50 -bs 25 -o {output_file}"
-    
-    run_command(command) # Execute the command
-    
-    if os.path.exists(output_file) and os.path.getsize(output_file) > 0:
-        with open(output_file, 'r') as f:
-            results_count = len(f.readlines())
-        console.print(f"[bold green][+] Nuclei scan complete. Found {results_count} potential vulnerabilities. Results saved to {output_file}[/bold green]")
+    console.print(f"[yellow][*] Running Nuclei ({scan_type}) on {input_file}...[/yellow]")
+    settings = get_nuclei_settings(config, scan_type)
+
+    # -c: template concurrency, -bs: number of targets scanned per template in parallel
+    # -stats -sj: JSON progress statistics on stderr, used for the dashboard's ETA
+    # -nc: nuclei only strips colours for -o files, and results are streamed from stdout into output_file
+    command = f"nuclei -l {input_file} -c {settings['concurrency']} -bs {settings['bulk_size']} -stats -sj -nc"
+    templates = settings.get('templates') or []
+    if templates:
+        command += f" -t {','.join(templates)}"
+    exclude_templates = settings.get('exclude_templates') or []
+    if exclude_templates:
+        command += f" -et {','.join(exclude_templates)}"
+    if settings.get('tags'):
+        command += f" -tags {','.join(settings['tags'])}"
+    if settings.get('dast'):
+        command += " -dast"
+
+    # Route requests through the shared response cache if it is enabled
+    proxy_url = get_proxy_url(config)
+    if proxy_url:
+        command += f" -proxy {proxy_url}"
+
+    results_count = stream_command(command, output_file, label=f"nuclei ({scan_type})") # Execute the command
+
+    if results_count:
+        console.print(f"[bold green][+] Nuclei ({scan_type}) complete. Found {results_count} potential vulnerabilities. Results saved to {output_file}[/bold green]")
         return output_file # Return the path to the file
     else:
-        console.print("[yellow][!] Nuclei scan completed, but no vulnerabilities were found or output file is empty.[/yellow]")
+        console.print(f"[yellow][!] Nuclei ({scan_type}) completed, but no vulnerabilities were found or output file is empty.[/yellow]")
         return None
 
+
+def run_nuclei_host_scan(input_file, config):
+    """
+    Runs the host-level Nuclei pass (the standard, non-DAST template set) once per origin.
+
+    Args:
+        input_file (str): Path to the file containing deduplicated origins.
+        config (dict): The configuration dictionary.
+
+    Returns:
+        str: Path to the output file if successful, None otherwise.
+    """
+    return run_nuclei(input_file, config, 'host_scan', "vulns/nuclei_host_raw.txt")
+
+
+def run_nuclei_url_scan(input_file, config):
+    """
+    Runs the URL-level Nuclei pass over parameterized URLs only.
+
+    Args:
+        input_file (str): Path to the file containing parameterized URLs.
+        config (dict): The configuration dictionary.
+
+    Returns:
+        str: Path to the output file if successful, None otherwise.
+    """
+    return run_nuclei(input_file, config, 'url_scan', "vulns/nuclei_url_raw.txt")
+
+
+def nuclei_result_host(line):
+    """Returns the hostname a Nuclei result line matched (URL or host:port), or None if it cannot be parsed."""
+    match = NUCLEI_RESULT_PATTERN.match(line)
+    return url_hostname(match.group(2)) if match else None
+
+
+def nuclei_finding_key(line, scan_type):
+    """
+    Returns the key a Nuclei result line is deduplicated on.
+
+    Host-level findings are kept once per (template, host), as host-level templates
+    report the same issue for every URL of a host. URL-level (DAST) findings are kept
+    once per (template, scheme://host/path, parameter names), so different injectable
+    endpoints or parameters on one host stay separate findings while payload variations
+    of the same parameter collapse. Lines that cannot be parsed are their own key.
+
+    Args:
+        line (str): A Nuclei result line.
+        scan_type (str): Either 'host_scan' or 'url_scan'.
+
+    Returns:
+        tuple or str: The deduplication key.
+    """
+    match = NUCLEI_RESULT_PATTERN.match(line)
+    if not match:
+        return line
+    template_id, matched = match.groups()
+    parsed = urlsplit(matched)
+    if scan_type == 'host_scan' or not parsed.netloc:
+        return (scan_type, template_id, (parsed.netloc or matched).lower())
+    param_names = tuple(sorted({name for name, _ in parse_qsl(parsed.query, keep_blank_values=True)}))
+    return (scan_type, template_id, f"{parsed.scheme.lower()}://{parsed.netloc.lower()}{parsed.path}", param_names)
+
+
+def merge_nuclei_results(host_output_files, url_output_files, output_filename):
+    """
+    Merges the results of the Nuclei passes, deduplicating each pass with its own
+    key (see nuclei_finding_key).
+
+    Args:
+        host_output_files (list): Paths to host-level Nuclei output files (entries may be None).
+        url_output_files (list): Paths to URL-level Nuclei output files (entries may be None).
+        output_filename (str): Path where the merged results are written.
+
+    Returns:
+        list: The merged, sorted result lines.
+    """
+    findings = {}
+    for scan_type, raw_output_files in (('host_scan', host_output_files), ('url_scan', url_output_files)):
+        for file_path in raw_output_files:
+            if not file_path or not os.path.exists(file_path):
+                continue
+            with open(file_path, 'r') as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        findings.setdefault(nuclei_finding_key(line, scan_type), line)
+
+    merged = sorted(set(findings.values()))
+    if merged:
+        with open(output_filename, 'w') as f:
+            for line in merged:
+                f.write(f"{line}\n")
+        console.print(f"[bold green][+] Merged {len(merged)} unique findings into {output_filename}[/bold green]")
+    else:
+        console.print(f"[yellow][!] No findings to save to {output_filename}.[/yellow]")
+    return merged
+
 # This is a main block for testing this module individually
 if __name__ == '__main__':
     test_urls = ["http://scanme.nmap.org", "http://testphp.vulnweb.com"]
@@ -51,7 +268,7 @@ if __name__ == '__main__':
     if not os.path.exists("vulns"): # Ensure 'vulns' directory exists for testing
         os.makedirs("vulns")
 
-    nuclei_output_file = run_nuclei(test_file, test_config)
+    nuclei_output_file = run_nuclei_host_scan(test_file, test_config)
     if nuclei_output_file:
         print(f"\nNuclei Results saved to: {nuclei_output_file}")
     else:
@@ -0,0 +1,366 @@
+# This module keeps a persistent index of hosts and URLs already processed, shared across targets and runs.
+#
+# When many related domains are scanned, the same third-party hosts (CDN edges, shared
+# SaaS frontends, redirect targets) come up for every target. The index records, per
+# stage, which keys (subdomains, origins or URLs) were processed, when, for which
+# target and in which run directory, and optionally the results they produced. Until
+# an entry expires, later runs skip the key and reuse the stored results instead.
+import os
+import json
+import time
+import socket
+import sqlite3
+import ipaddress
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from rich.console import Console
+from utils.url_utils import url_hostname
+
+console = Console()
+
+DEFAULT_GLOBAL_INDEX_SETTINGS = {
+    'enabled': False,
+    'path': "~/.recon_framework/global_index.db",
+    # Seconds an entry stays valid; 604800 = 7 days
+    'ttl': 604800,
+    # Skip hosts whose addresses all fall in one of the cdn_ranges below
+    'skip_cdn': False,
+    # Provider name -> list of CIDR ranges
+    'cdn_ranges': {},
+    # Additional files with one CIDR per line; the file name is used as the provider name
+    'cdn_ranges_files': [],
+}
+
+REFERENCES_FILE = "misc/global_index_references.txt"
+CDN_HOSTS_FILE = "misc/cdn_hosts.txt"
+
+# SQLite limits the number of bound parameters per statement
+LOOKUP_CHUNK_SIZE = 500
+
+
+def get_global_index_settings(config):
+    """
+    Returns the global index settings, with config.yaml values overriding the defaults.
+
+    Args:
+        config (dict): The configuration dictionary.
+
+    Returns:
+        dict: The merged global index settings.
+    """
+    settings = dict(DEFAULT_GLOBAL_INDEX_SETTINGS)
+    settings.update(config.get('global_index') or {})
+    return settings
+
+
+class GlobalIndex:
+    """
+    A SQLite-backed index of processed keys per stage, with TTL-based expiry.
+    Safe to share between runs executing at the same time.
+
+    Args:
+        path (str): Path of the database file.
+        ttl (int): Seconds an entry stays valid.
+    """
+
+    def __init__(self, path, ttl):
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self.ttl = ttl
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS processed ("
+            " stage TEXT NOT NULL, key TEXT NOT NULL, target TEXT, run_dir TEXT,"
+            " processed_at REAL NOT NULL, results TEXT, PRIMARY KEY (stage, key))"
+        )
+        self.purge_expired()
+
+    def purge_expired(self):
+        """Deletes entries older than the TTL."""
+        with self.conn:
+            self.conn.execute("DELETE FROM processed WHERE processed_at < ?", (time.time() - self.ttl,))
+
+    def lookup(self, stage, keys):
+        """
+        Returns the fresh entries for the given keys of a stage.
+
+        Args:
+            stage (str): The pipeline stage (e.g. "crawl").
+            keys (iterable): Keys to look up.
+
+        Returns:
+            dict: key -> {'target', 'run_dir', 'processed_at', 'results'} for keys found.
+        """
+        keys = list(keys)
+        cutoff = time.time() - self.ttl
+        found = {}
+        for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+            chunk = keys[start:start + LOOKUP_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT key, target, run_dir, processed_at, results FROM processed"
+                f" WHERE stage = ? AND processed_at >= ? AND key IN ({placeholders})",
+                [stage, cutoff] + chunk,
+            )
+            for key, target, run_dir, processed_at, results in rows:
+                found[key] = {
+                    'target': target,
+                    'run_dir': run_dir,
+                    'processed_at': processed_at,
+                    'results': json.loads(results) if results is not None else None,
+                }
+        return found
+
+    def record(self, stage, entries, target, run_dir):
+        """
+        Marks keys of a stage as processed now.
+
+        Args:
+            stage (str): The pipeline stage.
+            entries (dict): key -> list of result lines, or None if results are not stored.
+            target (str): The target domain the keys were processed for.
+            run_dir (str): The run's output directory.
+        """
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO processed (stage, key, target, run_dir, processed_at, results)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    (stage, key, target, run_dir, now, json.dumps(results) if results is not None else None)
+                    for key, results in entries.items()
+                ),
+            )
+
+    def close(self):
+        self.conn.close()
+
+
+def open_global_index(config):
+    """
+    Opens the global index if it is enabled.
+
+    Args:
+        config (dict): The configuration dictionary.
+
+    Returns:
+        GlobalIndex: The open index, or None if disabled or unavailable.
+    """
+    settings = get_global_index_settings(config)
+    if not settings['enabled']:
+        return None
+    try:
+        return GlobalIndex(settings['path'], settings['ttl'])
+    except (sqlite3.Error, OSError) as e:
+        console.print(f"[yellow][!] Warning: Could not open global index {settings['path']}: {e}[/yellow]")
+        return None
+
+
+class CdnClassifier:
+    """
+    Classifies hosts by the provider owning the IP ranges they resolve to.
+
+    Args:
+        ranges (dict): Provider name -> list of CIDR strings.
+    """
+
+    def __init__(self, ranges):
+        self.networks = []
+        for provider, cidrs in ranges.items():
+            for cidr in cidrs:
+                try:
+                    self.networks.append((ipaddress.ip_network(cidr.strip(), strict=False), provider))
+                except ValueError:
+                    console.print(f"[yellow][!] Warning: Ignoring invalid CIDR '{cidr}' for {provider}.[/yellow]")
+        self.cache = {}
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Builds a classifier from the cdn_ranges and cdn_ranges_files settings."""
+        ranges = {provider: list(cidrs) for provider, cidrs in (settings['cdn_ranges'] or {}).items()}
+        for file_path in settings['cdn_ranges_files'] or []:
+            file_path = os.path.expanduser(file_path)
+            provider = os.path.splitext(os.path.basename(file_path))[0]
+            try:
+                with open(file_path, 'r') as f:
+                    ranges.setdefault(provider, []).extend(
+                        line.strip() for line in f if line.strip() and not line.startswith('#')
+                    )
+            except OSError as e:
+                console.print(f"[yellow][!] Warning: Could not read CDN ranges from {file_path}: {e}[/yellow]")
+        return cls(ranges)
+
+    def provider_for_ip(self, address):
+        ip = ipaddress.ip_address(address)
+        for network, provider in self.networks:
+            if ip.version == network.version and ip in network:
+                return provider
+        return None
+
+    def classify(self, hostname):
+        """
+        Returns the provider if every address the hostname resolves to belongs to
+        a known range, None otherwise (including when it does not resolve).
+        """
+        if hostname in self.cache:
+            return self.cache[hostname]
+        try:
+            ipaddress.ip_address(hostname)
+            addresses = {hostname}
+        except ValueError:
+            try:
+                addresses = {info[4][0] for info in socket.getaddrinfo(hostname, None)}
+            except (socket.gaierror, UnicodeError, OSError):
+                addresses = set()
+        providers = {self.provider_for_ip(address.split('%')[0]) for address in addresses}
+        provider = providers.pop() if len(providers) == 1 else None
+        self.cache[hostname] = provider
+        return provider
+
+    def classify_many(self, hostnames, threads=50):
+        """Classifies hostnames concurrently. Returns hostname -> provider (or None)."""
+        hostnames = sorted(set(hostnames))
+        if not self.networks or not hostnames:
+            return {hostname: None for hostname in hostnames}
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            return dict(zip(hostnames, executor.map(self.classify, hostnames)))
+
+
+def append_lines(file_path, lines):
+    """Appends lines to a file, creating its directory if needed."""
+    if not lines:
+        return
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(file_path, 'a') as f:
+        for line in lines:
+            f.write(f"{line}\n")
+
+
+def filter_stage_input(stage, input_file, output_file, key_func, domain, config, index, allow_cdn_skip=True):
+    """
+    Prepares the input of a stage: drops entries whose key was already processed
+    by an earlier run or target (and, optionally, hosts served from known CDN/SaaS
+    ranges), writes the rest to output_file, and returns the stored results of the
+    skipped keys so they can be reused.
+
+    Skipped keys are listed in misc/global_index_references.txt together with the
+    target and run directory that processed them.
+
+    Args:
+        stage (str): The pipeline stage (e.g. "crawl").
+        input_file (str): The stage's full input, one entry per line.
+        output_file (str): Where the entries that still need processing are written.
+        key_func (callable): Maps an input line to its index key (or None to keep it unconditionally).
+        domain (str): The current target domain.
+        config (dict): The configuration dictionary.
+        index (GlobalIndex): The open global index, or None when only CDN filtering is wanted.
+        allow_cdn_skip (bool, optional): Whether skip_cdn applies to this stage. Defaults to True.
+
+    Returns:
+        tuple: (number of entries written, list of reused result lines)
+    """
+    settings = get_global_index_settings(config)
+    with open(input_file, 'r') as f:
+        entries = [(line, key_func(line)) for line in (raw.strip() for raw in f) if line]
+
+    keys = {key for _, key in entries if key}
+    known = index.lookup(stage, keys) if index else {}
+
+    cdn_hosts = {}
+    if settings['skip_cdn'] and allow_cdn_skip:
+        classifier = CdnClassifier.from_settings(settings)
+        hostnames = {url_hostname(key) for key in keys - set(known)}
+        threads = config.get('settings', {}).get('threads', 50)
+        cdn_hosts = {hostname: provider for hostname, provider in classifier.classify_many(hostnames - {None}, threads).items() if provider}
+        append_lines(CDN_HOSTS_FILE, [f"{hostname}\t{provider}" for hostname, provider in sorted(cdn_hosts.items())])
+
+    written = 0
+    skipped_cdn = 0
+    with open(output_file, 'w') as out:
+        for line, key in entries:
+            if key and key in known:
+                continue
+            if key and cdn_hosts and url_hostname(key) in cdn_hosts:
+                skipped_cdn += 1
+                continue
+            out.write(f"{line}\n")
+            written += 1
+
+    reused = []
+    references = []
+    for key, entry in sorted(known.items()):
+        processed_at = datetime.fromtimestamp(entry['processed_at']).isoformat(timespec='seconds')
+        references.append(f"{stage}\t{key}\t{entry['target']}\t{entry['run_dir']}\t{processed_at}")
+        reused.extend(entry['results'] or [])
+    append_lines(REFERENCES_FILE, references)
+
+    if known or skipped_cdn:
+        console.print(
+            f"[cyan][*] Global index ({stage}): {len(known)} entries already processed by earlier runs "
+            f"({len(reused)} results reused), {skipped_cdn} skipped as CDN/SaaS hosts, {written} left to process.[/cyan]"
+        )
+    return written, reused
+
+
+def record_stage_results(stage, input_file, result_files, key_func, result_host_func, domain, index, store_results=True,
+                         completed=True):
+    """
+    Records every key of a stage's input as processed, along with the result lines
+    that belong to it.
+
+    Result lines are matched to keys by hostname, since tools report results under
+    other schemes and ports than the input (gau returns http:// URLs for https://
+    hosts, nuclei reports host:443 for TLS checks). A line is stored under every key
+    of its host. Lines for hosts that are not in the input are not stored, and their
+    number is reported.
+
+    Nothing is recorded if the stage did not complete, as a tool
+    that was missing, failed or timed out would otherwise make its hosts look dead
+    or clean to every later run until the entries expire.
+
+    Args:
+        stage (str): The pipeline stage.
+        input_file (str): The input the stage actually processed.
+        result_files (list): The stage's output files (entries may be None).
+        key_func (callable): Maps an input line to its index key.
+        result_host_func (callable): Maps a result line to the hostname it belongs to.
+        domain (str): The current target domain.
+        index (GlobalIndex): The open global index.
+        store_results (bool, optional): Whether result lines are stored for reuse. Defaults to True.
+        completed (bool, optional): Whether every tool of the stage finished successfully. Defaults to True.
+    """
+    if not index or not os.path.exists(input_file):
+        return
+    if not completed:
+        console.print(f"[yellow][!] Global index ({stage}): the stage did not finish successfully; its entries are not recorded.[/yellow]")
+        return
+    with open(input_file, 'r') as f:
+        keys = (key_func(line) for line in (raw.strip() for raw in f) if line)
+        entries = {key: [] if store_results else None for key in keys if key}
+    if store_results:
+        keys_by_host = {}
+        for key in entries:
+            keys_by_host.setdefault(url_hostname(key), []).append(key)
+        unmatched = 0
+        for file_path in result_files:
+            if not file_path or not os.path.exists(file_path):
+                continue
+            with open(file_path, 'r') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    host_keys = keys_by_host.get(result_host_func(line))
+                    if not host_keys:
+                        unmatched += 1
+                        continue
+                    for key in host_keys:
+                        entries[key].append(line)
+        for key in entries:
+            entries[key] = sorted(set(entries[key]))
+        if unmatched:
+            console.print(f"[cyan][*] Global index ({stage}): {unmatched} result lines belong to hosts outside this stage's input and are not stored for reuse.[/cyan]")
+    index.record(stage, entries, domain, os.getcwd())
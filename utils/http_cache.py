@@ -0,0 +1,629 @@
+# This module provides a local caching forward proxy shared by the scanning tools.
+#
+# katana and nuclei are pointed at the proxy with their proxy flags so that
+# repeated GET requests for the same page within a run are answered from an
+# on-disk cache instead of hitting the target again. httpx is not: it probes
+# liveness, which has to be observed directly.
+#
+# The proxy never answers on behalf of an unreachable target. If the upstream
+# connection fails, the client connection is closed, so tools see the same
+# connection error they would see without the proxy.
+#
+# HTTPS requests arrive as CONNECT tunnels. With intercept_tls enabled, the proxy
+# terminates them with a certificate for the requested host, signed by a local CA
+# generated with the openssl command line tool, and caches the decrypted requests
+# like plain HTTP ones. katana and nuclei do not verify certificates, so the CA
+# never has to be trusted. Without openssl, tunnels are relayed as-is and not cached.
+# nuclei's ssl/ templates connect directly (an HTTP proxy only carries its HTTP
+# requests), so they still see the target's real certificate.
+import hashlib
+import http.client
+import ipaddress
+import json
+import os
+import re
+import select
+import shutil
+import socket
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+from rich.console import Console
+
+console = Console()
+
+DEFAULT_CACHE_SETTINGS = {
+    'enabled': False,
+    'host': "127.0.0.1",
+    'port': 8118,
+    'directory': "misc/http_cache",
+    'max_size_mb': 512,
+    'ttl': 3600,
+    # Terminate HTTPS tunnels with a local CA so HTTPS responses are cached too
+    'intercept_tls': True,
+    'ca_directory': "misc/http_cache_ca",
+    # Request headers that change the response and are therefore part of the cache key
+    'key_headers': ["Accept", "Accept-Encoding", "Accept-Language", "Authorization", "Cookie", "Range"],
+}
+
+CACHEABLE_METHODS = ("GET", "HEAD")
+CACHEABLE_STATUSES = (200, 203, 204, 300, 301, 302, 307, 308, 404, 410)
+
+# Headers that only apply to a single connection and must not be forwarded or stored
+HOP_BY_HOP_HEADERS = {
+    'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization',
+    'proxy-connection', 'te', 'trailer', 'transfer-encoding', 'upgrade',
+}
+
+
+def get_cache_settings(config):
+    """
+    Returns the HTTP cache settings, with config.yaml values overriding the defaults.
+
+    Args:
+        config (dict): The configuration dictionary.
+
+    Returns:
+        dict: The merged cache settings.
+    """
+    settings = dict(DEFAULT_CACHE_SETTINGS)
+    settings.update(config.get('http_cache') or {})
+    return settings
+
+
+def get_proxy_url(config):
+    """
+    Returns the URL tools should use as their HTTP proxy, or None if the cache is
+    disabled or its proxy is not running. The URL is the address the proxy actually
+    bound to, recorded in the config by CachingProxy.start() (so port 0 works).
+
+    Args:
+        config (dict): The configuration dictionary.
+
+    Returns:
+        str: The proxy URL (e.g. "http://127.0.0.1:8118"), or None.
+    """
+    settings = get_cache_settings(config)
+    if not settings['enabled']:
+        return None
+    return settings.get('proxy_url')
+
+
+class ResponseCache:
+    """
+    An on-disk response store with an in-memory LRU index, a total size cap and
+    per-entry expiry. Each entry is a single file holding a JSON metadata line
+    followed by the raw response body.
+    """
+
+    def __init__(self, directory, max_size_bytes, ttl):
+        self.directory = directory
+        self.max_size_bytes = max_size_bytes
+        self.ttl = ttl
+        self.index = OrderedDict() # key -> (size, expires_at)
+        self.total_size = 0
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'bypassed': 0, 'stored': 0, 'evicted': 0, 'bytes_served_from_cache': 0}
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def _load_index(self):
+        """Rebuilds the index from entries already on disk, oldest first."""
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith('.tmp'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    with open(path, 'rb') as f:
+                        meta = json.loads(f.readline())
+                    entries.append((os.path.getmtime(path), name, os.path.getsize(path), meta['expires_at']))
+                except (OSError, ValueError, KeyError):
+                    continue
+        for _, key, size, expires_at in sorted(entries):
+            self.index[key] = (size, expires_at)
+            self.total_size += size
+        self._evict()
+
+    @staticmethod
+    def make_key(method, url, headers, key_headers):
+        """
+        Builds a cache key from the request method, URL and the request headers
+        that can change the response.
+        """
+        parts = [method.upper(), url]
+        for name in key_headers:
+            parts.append(f"{name.lower()}:{headers.get(name, '')}")
+        return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+    def get(self, key):
+        """
+        Returns (status, reason, headers, body) for a fresh entry, or None on a miss.
+        """
+        with self.lock:
+            entry = self.index.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            if entry[1] < time.time():
+                self._remove(key)
+                self.stats['misses'] += 1
+                return None
+            self.index.move_to_end(key)
+
+        try:
+            with open(self._path(key), 'rb') as f:
+                meta = json.loads(f.readline())
+                body = f.read()
+        except (OSError, ValueError):
+            with self.lock:
+                if key in self.index:
+                    self._remove(key)
+                self.stats['misses'] += 1
+            return None
+
+        with self.lock:
+            self.stats['hits'] += 1
+            self.stats['bytes_served_from_cache'] += len(body)
+        return meta['status'], meta['reason'], meta['headers'], body
+
+    def put(self, key, status, reason, headers, body):
+        """Stores a response on disk and evicts least recently used entries past the size cap."""
+        expires_at = time.time() + self.ttl
+        meta = json.dumps({'status': status, 'reason': reason, 'headers': headers, 'expires_at': expires_at})
+        data = meta.encode() + b"\n" + body
+        if len(data) > self.max_size_bytes:
+            return
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self.lock:
+            if key in self.index:
+                self.total_size -= self.index.pop(key)[0]
+            self.index[key] = (len(data), expires_at)
+            self.total_size += len(data)
+            self.stats['stored'] += 1
+            self._evict()
+
+    def record_bypass(self):
+        """Counts a request that went through the proxy without a cache lookup."""
+        with self.lock:
+            self.stats['bypassed'] += 1
+
+    def _remove(self, key):
+        size, _ = self.index.pop(key)
+        self.total_size -= size
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _evict(self):
+        while self.total_size > self.max_size_bytes and self.index:
+            self._remove(next(iter(self.index)))
+            self.stats['evicted'] += 1
+
+    def get_stats(self):
+        """Returns a copy of the cache counters together with the hit rate and current size."""
+        with self.lock:
+            stats = dict(self.stats)
+            stats['entries'] = len(self.index)
+            stats['size_bytes'] = self.total_size
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
+
+
+# Host names certificates are generated for; anything else is tunneled without interception
+HOSTNAME_PATTERN = re.compile(r'^[A-Za-z0-9_.-]{1,253}$')
+
+
+class CertificateAuthority:
+    """
+    A local certificate authority issuing a certificate per host name, used to
+    terminate HTTPS tunnels. Keys and certificates are created with the openssl
+    command line tool and kept in a directory, so they are reused across runs.
+
+    Args:
+        directory (str): Where the CA, the shared host key and the host certificates are stored.
+
+    Raises:
+        OSError: If openssl is not available or the CA cannot be created.
+    """
+
+    def __init__(self, directory):
+        if not shutil.which("openssl"):
+            raise OSError("openssl not found in PATH")
+        self.directory = directory
+        self.ca_key = os.path.join(directory, "ca.key")
+        self.ca_cert = os.path.join(directory, "ca.crt")
+        # One key is shared by all host certificates; only the certificates differ per host
+        self.host_key = os.path.join(directory, "host.key")
+        self.hosts_directory = os.path.join(directory, "hosts")
+        self.contexts = {}
+        self.lock = threading.Lock()
+        os.makedirs(self.hosts_directory, exist_ok=True)
+        if not (os.path.exists(self.ca_key) and os.path.exists(self.ca_cert)):
+            self._openssl("req", "-x509", "-newkey", "rsa:2048", "-nodes", "-keyout", self.ca_key,
+                          "-out", self.ca_cert, "-days", "3650", "-subj", "/CN=Recon Framework Cache CA")
+        if not os.path.exists(self.host_key):
+            self._openssl("genrsa", "-out", self.host_key, "2048")
+
+    @staticmethod
+    def _openssl(*args):
+        try:
+            subprocess.run(["openssl", *args], check=True, capture_output=True, timeout=30)
+        except subprocess.CalledProcessError as e:
+            raise OSError(f"openssl {args[0]} failed: {e.stderr.decode(errors='replace').strip()}")
+        except subprocess.TimeoutExpired:
+            raise OSError(f"openssl {args[0]} timed out")
+
+    def _issue(self, hostname, cert_path):
+        """Signs a certificate for hostname with the CA."""
+        try:
+            ipaddress.ip_address(hostname)
+            san = f"subjectAltName=IP:{hostname}"
+        except ValueError:
+            san = f"subjectAltName=DNS:{hostname}"
+        with tempfile.TemporaryDirectory(dir=self.directory) as work_dir:
+            csr_path = os.path.join(work_dir, "host.csr")
+            ext_path = os.path.join(work_dir, "host.ext")
+            with open(ext_path, 'w') as f:
+                f.write(f"{san}\n")
+            self._openssl("req", "-new", "-key", self.host_key, "-subj", "/CN=recon-cache", "-out", csr_path)
+            self._openssl("x509", "-req", "-in", csr_path, "-CA", self.ca_cert, "-CAkey", self.ca_key,
+                          "-set_serial", str(int.from_bytes(os.urandom(8), 'big')), "-days", "825",
+                          "-sha256", "-extfile", ext_path, "-out", f"{cert_path}.tmp")
+        os.replace(f"{cert_path}.tmp", cert_path)
+
+    def context_for(self, hostname):
+        """
+        Returns a server-side SSL context presenting a certificate for hostname,
+        issuing the certificate on first use.
+
+        Raises:
+            OSError: If the certificate cannot be issued or loaded.
+        """
+        hostname = hostname.lower()
+        with self.lock:
+            context = self.contexts.get(hostname)
+            if context:
+                return context
+            cert_path = os.path.join(self.hosts_directory, f"{hostname}.crt")
+            if not os.path.exists(cert_path):
+                self._issue(hostname, cert_path)
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            try:
+                context.load_cert_chain(cert_path, self.host_key)
+            except ssl.SSLError as e:
+                raise OSError(f"could not load certificate for {hostname}: {e}")
+            self.contexts[hostname] = context
+            return context
+
+
+class CachingProxyHandler(BaseHTTPRequestHandler):
+    """Handles proxy requests, answering cacheable ones from the server's ResponseCache."""
+
+    protocol_version = "HTTP/1.1"
+    # (host, port) of the HTTPS tunnel this connection was switched to, if it is intercepted
+    tunnel = None
+
+    def log_message(self, format, *args):
+        pass # Keep the console clean; the proxy is queried by thousands of requests
+
+    def do_CONNECT(self):
+        """
+        Terminates an HTTPS tunnel with a certificate for the target so its requests
+        can be cached, or relays it as-is if interception is off or not possible.
+        """
+        host, _, port = self.path.rpartition(':')
+        authority = self.server.authority
+        if authority and HOSTNAME_PATTERN.match(host) and port.isdigit():
+            try:
+                context = authority.context_for(host)
+            except OSError as e:
+                console.print(f"[yellow][!] Warning: Could not intercept {self.path}, relaying it uncached: {e}[/yellow]")
+            else:
+                self._intercept(context, host, int(port))
+                return
+
+        self.server.cache.record_bypass()
+        host, _, port = self.path.partition(':')
+        try:
+            upstream = socket.create_connection((host, int(port or 443)), timeout=self.server.upstream_timeout)
+        except (OSError, ValueError):
+            self.close_connection = True # Drop the client, as a direct connection would fail
+            return
+
+        self.send_response(200, "Connection Established")
+        self.end_headers()
+        sockets = [self.connection, upstream]
+        try:
+            while True:
+                readable, _, errored = select.select(sockets, [], sockets, self.server.upstream_timeout)
+                if errored or not readable:
+                    break
+                for sock in readable:
+                    data = sock.recv(65536)
+                    if not data:
+                        return
+                    (upstream if sock is self.connection else self.connection).sendall(data)
+        except OSError:
+            pass
+        finally:
+            upstream.close()
+            self.close_connection = True
+
+    def _intercept(self, context, host, port):
+        """Accepts the tunnel and continues serving this connection's requests over TLS."""
+        self.send_response(200, "Connection Established")
+        self.end_headers()
+        self.wfile.flush()
+        try:
+            connection = context.wrap_socket(self.connection, server_side=True)
+        except (ssl.SSLError, OSError):
+            self.close_connection = True
+            return
+        self.rfile.close()
+        self.wfile.close()
+        self.connection = connection
+        self.rfile = connection.makefile('rb')
+        self.wfile = connection.makefile('wb')
+        self.tunnel = (host, port)
+        self.close_connection = False
+
+    def finish(self):
+        super().finish()
+        if self.tunnel:
+            try:
+                self.connection.close()
+            except OSError:
+                pass
+
+    def _handle(self):
+        if self.tunnel:
+            # Requests inside an intercepted tunnel carry only the path
+            host, port = self.tunnel
+            url = f"https://{host}{'' if port == 443 else f':{port}'}{self.path}"
+        else:
+            url = self.path
+        parsed = urlsplit(url)
+        if parsed.scheme not in ("http", "https") or not parsed.hostname:
+            self.send_error(400, "Only absolute http:// URLs can be proxied")
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else None
+        cache = self.server.cache
+
+        key = None
+        if self.command in CACHEABLE_METHODS and body is None:
+            key = cache.make_key(self.command, url, self.headers, self.server.key_headers)
+            cached = cache.get(key)
+            if cached:
+                self._send(*cached)
+                return
+        else:
+            cache.record_bypass()
+
+        headers = {name: value for name, value in self.headers.items() if name.lower() not in HOP_BY_HOP_HEADERS}
+        path = parsed.path or "/"
+        if parsed.query:
+            path += f"?{parsed.query}"
+        try:
+            if parsed.scheme == "https":
+                # Like the tools themselves, do not verify the target's certificate
+                conn = http.client.HTTPSConnection(parsed.hostname, parsed.port or 443, timeout=self.server.upstream_timeout,
+                                                   context=ssl._create_unverified_context())
+            else:
+                conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=self.server.upstream_timeout)
+            conn.request(self.command, path, body=body, headers=headers)
+            response = conn.getresponse()
+            response_body = response.read()
+            # Content-Length is recomputed from the body, except for HEAD where there is no body
+            response_headers = [(name, value) for name, value in response.getheaders()
+                                if name.lower() not in HOP_BY_HOP_HEADERS
+                                and (self.command == "HEAD" or name.lower() != 'content-length')]
+            conn.close()
+        except (OSError, http.client.HTTPException):
+            # Drop the client instead of answering with an error page it could mistake for the target's
+            self.close_connection = True
+            return
+
+        if key and response.status in CACHEABLE_STATUSES and 'no-store' not in (response.getheader('Cache-Control') or ''):
+            cache.put(key, response.status, response.reason, response_headers, response_body)
+        self._send(response.status, response.reason, response_headers, response_body)
+
+    def _send(self, status, reason, headers, body):
+        self.send_response(status, reason)
+        for name, value in headers:
+            self.send_header(name, value)
+        if self.command != "HEAD":
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    do_GET = do_HEAD = do_POST = do_PUT = do_DELETE = do_PATCH = do_OPTIONS = _handle
+
+
+class CachingProxy:
+    """
+    A local caching forward proxy running in a background thread.
+
+    Usage:
+        proxy = CachingProxy(config)
+        if proxy.start():
+            ...
+            proxy.stop()
+    """
+
+    def __init__(self, config):
+        settings = get_cache_settings(config)
+        self.config = config
+        self.settings = settings
+        self.cache = ResponseCache(settings['directory'], int(settings['max_size_mb'] * 1024 * 1024), settings['ttl'])
+        self.server = None
+        self.thread = None
+        self.authority = None
+        if settings['intercept_tls']:
+            try:
+                self.authority = CertificateAuthority(settings['ca_directory'])
+            except OSError as e:
+                console.print(f"[yellow][!] Warning: HTTPS interception disabled ({e}); HTTPS traffic will be relayed uncached.[/yellow]")
+        self.upstream_timeout = config.get('settings', {}).get('timeout', 10)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2] if self.server else (self.settings['host'], self.settings['port'])
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """
+        Starts serving on the configured host and port (0 picks a free port) and
+        records the bound address in the config, where get_proxy_url() finds it.
+
+        Returns:
+            bool: True if the proxy is running, False if it could not bind (e.g. the
+            port is taken by another run), in which case tools run without the cache.
+        """
+        try:
+            self.server = ThreadingHTTPServer((self.settings['host'], self.settings['port']), CachingProxyHandler)
+        except OSError as e:
+            console.print(f"[yellow][!] Warning: Could not start the HTTP response cache on {self.settings['host']}:{self.settings['port']}: {e}. Continuing without it.[/yellow]")
+            return False
+        self.server.daemon_threads = True
+        self.server.cache = self.cache
+        self.server.authority = self.authority
+        self.server.key_headers = self.settings['key_headers']
+        self.server.upstream_timeout = self.upstream_timeout
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        # Tasks receive the config in their worker processes, so the bound URL travels with it
+        self.config['http_cache'] = dict(self.config.get('http_cache') or {}, proxy_url=self.url)
+        console.print(f"[bold green][+] HTTP response cache listening on {self.url} (store: {self.settings['directory']})[/bold green]")
+        return True
+
+    def stop(self, stats_file=None):
+        """
+        Stops the proxy and optionally writes the cache statistics to a JSON file.
+
+        Args:
+            stats_file (str, optional): Path where the hit-rate metrics are written. Defaults to None.
+
+        Returns:
+            dict: The final cache statistics.
+        """
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+            (self.config.get('http_cache') or {}).pop('proxy_url', None)
+        stats = self.cache.get_stats()
+        if stats_file:
+            try:
+                with open(stats_file, 'w') as f:
+                    json.dump(stats, f, indent=2)
+            except OSError as e:
+                console.print(f"[yellow][!] Warning: Could not write cache statistics to {stats_file}: {e}[/yellow]")
+        return stats
+
+    def print_stats(self):
+        """Prints the current hit-rate metrics."""
+        stats = self.cache.get_stats()
+        console.print(
+            f"[bold cyan][*] HTTP cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.1%} hit rate), {stats['bypassed']} bypassed, "
+            f"{stats['bytes_served_from_cache']} bytes served from cache.[/bold cyan]"
+        )
+
+
+# This is a main block for testing this module individually
+if __name__ == '__main__':
+    import tempfile
+    import urllib.error
+    import urllib.request
+
+    # A local origin server that counts the requests it actually receives
+    origin_requests = []
+
+    class OriginHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            origin_requests.append(self.path)
+            body = f"page {self.path}\n".encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    origin = ThreadingHTTPServer(("127.0.0.1", 0), OriginHandler)
+    threading.Thread(target=origin.serve_forever, daemon=True).start()
+    origin_url = f"http://127.0.0.1:{origin.server_address[1]}"
+
+    console.print(f"[bold blue]--- Running Test for http_cache.py ---[/bold blue]")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        test_config = {'http_cache': {'enabled': True, 'port': 0, 'directory': os.path.join(cache_dir, "store"),
+                                      'ca_directory': os.path.join(cache_dir, "ca")}}
+        proxy = CachingProxy(test_config)
+        assert proxy.start()
+        assert get_proxy_url(test_config) == proxy.url and not proxy.url.endswith(":0"), proxy.url
+
+        opener = urllib.request.build_opener(urllib.request.ProxyHandler({'http': get_proxy_url(test_config)}))
+        bodies = [opener.open(f"{origin_url}/index.html").read() for _ in range(2)]
+        assert bodies[0] == bodies[1] == b"page /index.html\n", bodies
+        assert origin_requests == ["/index.html"], origin_requests
+
+        # HTTPS requests are intercepted and cached as well (the test origin borrows a certificate from the proxy's CA)
+        if proxy.authority:
+            secure_origin = ThreadingHTTPServer(("127.0.0.1", 0), OriginHandler)
+            secure_origin.socket = proxy.authority.context_for("127.0.0.1").wrap_socket(secure_origin.socket, server_side=True)
+            threading.Thread(target=secure_origin.serve_forever, daemon=True).start()
+            tls_opener = urllib.request.build_opener(
+                urllib.request.ProxyHandler({'https': get_proxy_url(test_config)}),
+                urllib.request.HTTPSHandler(context=ssl._create_unverified_context()),
+            )
+            secure_url = f"https://127.0.0.1:{secure_origin.server_address[1]}/secure.html"
+            bodies = [tls_opener.open(secure_url).read() for _ in range(2)]
+            assert bodies[0] == bodies[1] == b"page /secure.html\n", bodies
+            assert origin_requests == ["/index.html", "/secure.html"], origin_requests
+            secure_origin.shutdown()
+
+        # An unreachable target must look unreachable through the proxy too, not answer with an error page
+        try:
+            opener.open("http://127.0.0.1:1/", timeout=5)
+            raise AssertionError("unreachable target answered through the proxy")
+        except urllib.error.HTTPError as e:
+            raise AssertionError(f"proxy answered with HTTP {e.code} for an unreachable target")
+        except (OSError, http.client.HTTPException):
+            pass
+
+        # A second run on the same port must fall back to running without the cache
+        busy_config = {'http_cache': {'enabled': True, 'port': int(proxy.url.rsplit(':', 1)[1]), 'directory': os.path.join(cache_dir, "store"),
+                                      'ca_directory': os.path.join(cache_dir, "ca")}}
+        assert not CachingProxy(busy_config).start()
+        assert get_proxy_url(busy_config) is None
+
+        proxy.print_stats()
+        stats = proxy.stop()
+        assert stats['hits'] == stats['stored'] == (2 if proxy.authority else 1), stats
+        assert get_proxy_url(test_config) is None
+
+    origin.shutdown()
+    console.print("[bold green][+] Repeated HTTP and HTTPS requests served from cache; unreachable target and busy port handled.[/bold green]")
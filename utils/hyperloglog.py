@@ -0,0 +1,56 @@
+# This module provides a HyperLogLog sketch for counting unique lines in bounded memory.
+#
+# Keeping a digest of every output line to count distinct results costs memory in
+# proportion to the output (hundreds of MB for millions of URLs). A HyperLogLog sketch
+# with 2^14 one-byte registers estimates the same count within about 1% in 16 KB, and
+# two sketches are merged by taking the maximum of each register, so register updates
+# can be shipped from worker processes to the dashboard instead of the lines themselves.
+import hashlib
+import math
+
+
+class HyperLogLog:
+    """
+    A HyperLogLog cardinality estimator backed by a bytearray of registers.
+
+    Args:
+        precision (int, optional): Number of index bits; the sketch has 2^precision
+            registers and a standard error of about 1.04 / sqrt(2^precision). Defaults to 14.
+    """
+
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(self.size)
+        self.alpha = 0.7213 / (1 + 1.079 / self.size)
+
+    def add(self, item):
+        """
+        Adds an item to the sketch.
+
+        Returns:
+            tuple: (register index, new value) if a register increased, None otherwise.
+        """
+        value = int.from_bytes(hashlib.blake2b(item.encode(), digest_size=8).digest(), 'big')
+        index = value >> (64 - self.precision)
+        remaining = value & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - remaining.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+            return index, rank
+        return None
+
+    def update(self, updates):
+        """Merges register updates (index -> value), as produced by add() on another sketch."""
+        for index, rank in updates.items():
+            if rank > self.registers[index]:
+                self.registers[index] = rank
+
+    def count(self):
+        """Returns the estimated number of distinct items added."""
+        estimate = self.alpha * self.size * self.size / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        # Small cardinalities are estimated more accurately by linear counting
+        if estimate <= 2.5 * self.size and zeros:
+            return int(round(self.size * math.log(self.size / zeros)))
+        return int(round(estimate))
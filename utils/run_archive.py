@@ -0,0 +1,467 @@
+# This module packs the line-oriented outputs of a finished phase into a compact archive.
+#
+# A phase directory (subs/, hosts/, urls/, vulns/) typically holds several raw tool
+# outputs plus a combined copy, so every line is stored more than once. The archive
+# stores each unique line a single time, together with a bitmask of the files it came
+# from, so any of the original files can be reconstructed from it.
+#
+# Layout of an archive file:
+#   MAGIC | block | block | ... | index | footer
+#
+# Lines are sorted and split into blocks. Inside a block each line is front-coded
+# against the previous one (shared prefix length + remaining suffix), which collapses
+# the repeated schemes and hostnames of URL lists, and the block is then compressed
+# with LZMA. The JSON index records the source files and, for every block, its offset
+# and its first and last line, so prefix-filtered scans only decompress the blocks
+# that can contain matches.
+import sys
+import os
+import json
+import lzma
+import heapq
+import struct
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rich.console import Console
+
+console = Console()
+
+MAGIC = b"RCA1"
+FOOTER_FORMAT = "<QI4s" # index offset, index length, magic
+FOOTER_SIZE = struct.calcsize(FOOTER_FORMAT)
+
+DEFAULT_ARCHIVE_SETTINGS = {
+    'auto': False,
+    'directory': "archive",
+    'block_lines': 50000,
+    'compression_level': 6,
+    'remove_originals': True,
+}
+
+# Maximum number of sorted run files merged at once while writing an archive
+MAX_MERGE_RUNS = 128
+
+# Phase directories whose outputs are archived, in pipeline order
+ARCHIVABLE_PHASES = ["subs", "hosts", "urls", "vulns"]
+
+
+def get_archive_settings(config):
+    """
+    Returns the archive settings, with config.yaml values overriding the defaults.
+
+    Args:
+        config (dict): The configuration dictionary.
+
+    Returns:
+        dict: The merged archive settings.
+    """
+    settings = dict(DEFAULT_ARCHIVE_SETTINGS)
+    settings.update(config.get('archive') or {})
+    return settings
+
+
+def encode_varint(value):
+    """Encodes a non-negative integer as a LEB128 varint."""
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def decode_varint(data, pos):
+    """Decodes a LEB128 varint from data at pos. Returns (value, new_pos)."""
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def encode_block(entries):
+    """
+    Front-codes a sorted list of (line_bytes, source_mask) entries.
+
+    Returns:
+        bytes: The uncompressed block payload.
+    """
+    out = bytearray()
+    previous = b""
+    for line, mask in entries:
+        shared = 0
+        limit = min(len(previous), len(line))
+        while shared < limit and previous[shared] == line[shared]:
+            shared += 1
+        suffix = line[shared:]
+        out += encode_varint(shared)
+        out += encode_varint(len(suffix))
+        out += suffix
+        out += encode_varint(mask)
+        previous = line
+    return bytes(out)
+
+
+def decode_block(payload):
+    """Yields (line, source_mask) entries from an uncompressed block payload."""
+    pos = 0
+    previous = b""
+    while pos < len(payload):
+        shared, pos = decode_varint(payload, pos)
+        length, pos = decode_varint(payload, pos)
+        line = previous[:shared] + payload[pos:pos + length]
+        pos += length
+        mask, pos = decode_varint(payload, pos)
+        previous = line
+        yield line.decode('utf-8', errors='replace'), mask
+
+
+def write_sorted_run(chunk, directory):
+    """
+    Writes a chunk of line -> source_mask entries, sorted by line, to a temporary run file.
+    Each record is "<line>\\t<mask in hex>\\n"; the mask is split off the last tab.
+
+    Returns:
+        str: Path of the run file.
+    """
+    fd, run_path = tempfile.mkstemp(prefix=".run-", suffix=".tmp", dir=directory or ".")
+    with os.fdopen(fd, 'wb') as f:
+        for line, mask in sorted(chunk.items()):
+            f.write(line + b"\t" + format(mask, 'x').encode() + b"\n")
+    return run_path
+
+
+def iter_sorted_run(run_path):
+    """Yields the (line, source_mask) entries of a run file in order."""
+    with open(run_path, 'rb') as f:
+        for record in f:
+            line, _, mask = record[:-1].rpartition(b"\t")
+            yield line, int(mask, 16)
+
+
+def merge_sorted_entries(iterators):
+    """
+    Merges sorted (line, source_mask) streams into one, OR-ing the masks of equal lines.
+
+    Yields:
+        tuple: (line, source_mask) for each unique line, in sorted order.
+    """
+    current, current_mask = None, 0
+    for line, mask in heapq.merge(*iterators):
+        if line == current:
+            current_mask |= mask
+            continue
+        if current is not None:
+            yield current, current_mask
+        current, current_mask = line, mask
+    if current is not None:
+        yield current, current_mask
+
+
+def merge_runs(run_paths, directory):
+    """
+    Reduces the run files to at most MAX_MERGE_RUNS by merging them in groups,
+    so the final merge never holds more files open than that.
+
+    Returns:
+        list: Paths of the remaining run files.
+    """
+    while len(run_paths) > MAX_MERGE_RUNS:
+        merged_paths = []
+        for start in range(0, len(run_paths), MAX_MERGE_RUNS):
+            group = run_paths[start:start + MAX_MERGE_RUNS]
+            fd, merged_path = tempfile.mkstemp(prefix=".run-", suffix=".tmp", dir=directory or ".")
+            with os.fdopen(fd, 'wb') as f:
+                for line, mask in merge_sorted_entries([iter_sorted_run(path) for path in group]):
+                    f.write(line + b"\t" + format(mask, 'x').encode() + b"\n")
+            for path in group:
+                os.remove(path)
+            merged_paths.append(merged_path)
+        run_paths = merged_paths
+    return run_paths
+
+
+def write_archive(source_files, archive_path, block_lines=50000, compression_level=6):
+    """
+    Packs a set of line-oriented files into a single archive.
+
+    Lines are sorted externally: chunks of block_lines unique lines are sorted in
+    memory and written to temporary run files next to the archive, which are then
+    merged, so memory stays bounded by the block size however large the phase is.
+
+    Args:
+        source_files (list): Paths of the files to pack. Their base names identify them in the archive.
+        archive_path (str): Path of the archive to create.
+        block_lines (int, optional): Number of lines per compressed block. Defaults to 50000.
+        compression_level (int, optional): LZMA preset (0-9). Defaults to 6.
+
+    Returns:
+        dict: The archive index (sources, line counts and blocks).
+    """
+    archive_dir = os.path.dirname(archive_path)
+    if archive_dir:
+        os.makedirs(archive_dir, exist_ok=True)
+
+    # Each unique line is stored once with a bitmask of the files it appeared in
+    sources = []
+    run_paths = []
+    tmp_path = f"{archive_path}.tmp"
+    try:
+        chunk = {}
+        for bit, file_path in enumerate(source_files):
+            count = 0
+            with open(file_path, 'rb') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    chunk[line] = chunk.get(line, 0) | (1 << bit)
+                    count += 1
+                    if len(chunk) >= block_lines:
+                        run_paths.append(write_sorted_run(chunk, archive_dir))
+                        chunk = {}
+            sources.append({'name': os.path.basename(file_path), 'lines': count, 'bytes': os.path.getsize(file_path)})
+        if chunk:
+            run_paths.append(write_sorted_run(chunk, archive_dir))
+        del chunk
+        run_paths = merge_runs(run_paths, archive_dir)
+
+        index = {'version': 1, 'sources': sources, 'unique_lines': 0, 'blocks': []}
+        with open(tmp_path, 'wb') as out:
+            out.write(MAGIC)
+
+            def flush_block(block):
+                compressed = lzma.compress(encode_block(block), preset=compression_level)
+                index['blocks'].append({
+                    'offset': out.tell(),
+                    'length': len(compressed),
+                    'lines': len(block),
+                    'first': block[0][0].decode('utf-8', errors='replace'),
+                    'last': block[-1][0].decode('utf-8', errors='replace'),
+                })
+                out.write(compressed)
+
+            block = []
+            for entry in merge_sorted_entries([iter_sorted_run(path) for path in run_paths]):
+                block.append(entry)
+                index['unique_lines'] += 1
+                if len(block) >= block_lines:
+                    flush_block(block)
+                    block = []
+            if block:
+                flush_block(block)
+
+            index_data = lzma.compress(json.dumps(index).encode(), preset=compression_level)
+            index_offset = out.tell()
+            out.write(index_data)
+            out.write(struct.pack(FOOTER_FORMAT, index_offset, len(index_data), MAGIC))
+        os.replace(tmp_path, archive_path)
+    finally:
+        for path in run_paths + [tmp_path]:
+            if os.path.exists(path):
+                os.remove(path)
+    return index
+
+
+def read_index(archive_path):
+    """
+    Reads the index of an archive.
+
+    Args:
+        archive_path (str): Path of the archive.
+
+    Returns:
+        dict: The archive index.
+
+    Raises:
+        ValueError: If the file is not a valid archive.
+    """
+    with open(archive_path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{archive_path} is not a recon archive")
+        f.seek(-FOOTER_SIZE, os.SEEK_END)
+        index_offset, index_length, magic = struct.unpack(FOOTER_FORMAT, f.read(FOOTER_SIZE))
+        if magic != MAGIC:
+            raise ValueError(f"{archive_path} is truncated or corrupted")
+        f.seek(index_offset)
+        return json.loads(lzma.decompress(f.read(index_length)))
+
+
+def iter_archive(archive_path, source=None, prefix=None, contains=None):
+    """
+    Streams lines back out of an archive, one block at a time.
+
+    Args:
+        archive_path (str): Path of the archive.
+        source (str, optional): Only yield lines from this original file (by base name). Defaults to None.
+        prefix (str, optional): Only yield lines starting with this prefix. Blocks that cannot
+            contain such lines are skipped without being decompressed. Defaults to None.
+        contains (str, optional): Only yield lines containing this substring. Defaults to None.
+
+    Yields:
+        str: Matching lines, in sorted order.
+
+    Raises:
+        KeyError: If source is not part of the archive.
+    """
+    index = read_index(archive_path)
+    source_mask = None
+    if source is not None:
+        names = [entry['name'] for entry in index['sources']]
+        if source not in names:
+            raise KeyError(f"{source} is not in {archive_path}")
+        source_mask = 1 << names.index(source)
+
+    with open(archive_path, 'rb') as f:
+        for block in index['blocks']:
+            if prefix is not None:
+                # Lines are sorted, so matches lie between the block's first and last line
+                if block['last'] < prefix:
+                    continue
+                if block['first'] > prefix and not block['first'].startswith(prefix):
+                    break
+            f.seek(block['offset'])
+            payload = lzma.decompress(f.read(block['length']))
+            for line, mask in decode_block(payload):
+                if source_mask is not None and not mask & source_mask:
+                    continue
+                if prefix is not None and not line.startswith(prefix):
+                    continue
+                if contains is not None and contains not in line:
+                    continue
+                yield line
+
+
+def restore_file(archive_path, source, output_file):
+    """
+    Reconstructs one of the original files from an archive. Lines are restored
+    in sorted order.
+
+    Args:
+        archive_path (str): Path of the archive.
+        source (str): Base name of the original file.
+        output_file (str): Path of the file to write.
+
+    Returns:
+        int: The number of lines written.
+    """
+    count = 0
+    with open(output_file, 'w') as f:
+        for line in iter_archive(archive_path, source=source):
+            f.write(f"{line}\n")
+            count += 1
+    return count
+
+
+def archive_phase(phase_dir, config):
+    """
+    Packs every .txt output of a phase directory into archive/<phase>.rca and,
+    if configured, removes the original files once the archive is written.
+
+    Args:
+        phase_dir (str): The phase directory (e.g. "urls").
+        config (dict): The configuration dictionary.
+
+    Returns:
+        str: Path to the archive if one was written, None otherwise.
+    """
+    settings = get_archive_settings(config)
+    if not os.path.isdir(phase_dir):
+        return None
+    source_files = sorted(
+        os.path.join(phase_dir, name) for name in os.listdir(phase_dir)
+        if name.endswith('.txt') and os.path.getsize(os.path.join(phase_dir, name)) > 0
+    )
+    if not source_files:
+        return None
+
+    archive_path = os.path.join(settings['directory'], f"{phase_dir}.rca")
+    # Fold a previous archive of this phase back in so re-archiving never loses files
+    restored_files = []
+    if os.path.exists(archive_path):
+        present = {os.path.basename(path) for path in source_files}
+        for entry in read_index(archive_path)['sources']:
+            if entry['name'] not in present:
+                restored_path = os.path.join(phase_dir, entry['name'])
+                restore_file(archive_path, entry['name'], restored_path)
+                restored_files.append(restored_path)
+        source_files = sorted(source_files + restored_files)
+
+    index = write_archive(source_files, archive_path, settings['block_lines'], settings['compression_level'])
+    original_bytes = sum(entry['bytes'] for entry in index['sources'])
+    archive_bytes = os.path.getsize(archive_path)
+    ratio = original_bytes / archive_bytes if archive_bytes else 0
+    console.print(
+        f"[bold green][+] Archived {len(source_files)} files from {phase_dir}/ "
+        f"({index['unique_lines']} unique lines) into {archive_path}: "
+        f"{original_bytes} -> {archive_bytes} bytes ({ratio:.1f}x).[/bold green]"
+    )
+
+    if settings['remove_originals']:
+        for file_path in source_files:
+            try:
+                os.remove(file_path)
+            except OSError as e:
+                console.print(f"[yellow][!] Warning: Could not remove archived file {file_path}: {e}[/yellow]")
+    return archive_path
+
+
+def restore_from_archive(file_path, config):
+    """
+    Restores a phase output file (e.g. "urls/all_urls.txt") from its phase archive
+    if the file is missing.
+
+    Args:
+        file_path (str): Path of the phase output file.
+        config (dict): The configuration dictionary.
+
+    Returns:
+        bool: True if the file exists (or was restored) and is not empty, False otherwise.
+    """
+    if os.path.exists(file_path) and os.path.getsize(file_path) > 0:
+        return True
+    phase_dir, name = os.path.split(file_path)
+    archive_path = os.path.join(get_archive_settings(config)['directory'], f"{phase_dir}.rca")
+    if not os.path.exists(archive_path):
+        return False
+    try:
+        count = restore_file(archive_path, name, file_path)
+    except (KeyError, ValueError, OSError, lzma.LZMAError) as e:
+        console.print(f"[yellow][!] Warning: Could not restore {file_path} from {archive_path}: {e}[/yellow]")
+        return False
+    console.print(f"[bold green][+] Restored {count} lines to {file_path} from {archive_path}[/bold green]")
+    return count > 0
+
+
+# Command line access for filtered scans, e.g.:
+#   python utils/run_archive.py archive/urls.rca --source katana_raw.txt --prefix https://api.
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Read lines from a recon run archive.")
+    parser.add_argument("archive", help="Path to the .rca archive")
+    parser.add_argument("--source", help="Only show lines from this original file")
+    parser.add_argument("--prefix", help="Only show lines starting with this prefix")
+    parser.add_argument("--contains", help="Only show lines containing this substring")
+    parser.add_argument("--info", action="store_true", help="Show the archive index summary instead of lines")
+    args = parser.parse_args()
+
+    if args.info:
+        index = read_index(args.archive)
+        console.print(f"Unique lines: {index['unique_lines']}, blocks: {len(index['blocks'])}")
+        for entry in index['sources']:
+            console.print(f"  {entry['name']}: {entry['lines']} lines, {entry['bytes']} bytes")
+    else:
+        try:
+            for line in iter_archive(args.archive, source=args.source, prefix=args.prefix, contains=args.contains):
+                print(line)
+        except BrokenPipeError:
+            pass
@@ -1,8 +1,15 @@
 import subprocess
 import shlex
 import os
+import io
 import shutil
+import json
+import threading
+import time
+import signal
+import resource
 from rich.console import Console
+from utils.hyperloglog import HyperLogLog
 
 # --- Smart Environment Setup ---
 # Add custom tool directories to the PATH environment variable for this script's session.
@@ -16,64 +23,344 @@ os.environ['PATH'] = f"{go_bin_dir}:{local_bin_dir}:{os.environ['PATH']}"
 # Initialize a console for rich text output
 console = Console()
 
-def run_command(command, timeout=None, stdin_data=None):
+
+# --- Streaming execution with live progress reporting ---
+# Set by the task manager in each worker process so that streamed tools can report
+# their progress to the live dashboard. When unset, progress is simply not reported.
+progress_queue = None
+
+# How often (in seconds) a streaming tool sends a progress update
+PROGRESS_INTERVAL = 0.5
+
+
+# Outcome of every streamed run in this process ("done", "timed out", "exit 2", "not found", ...).
+# The task manager reports them back to the parent, so callers can tell a complete run
+# from one that failed or only produced partial output.
+run_statuses = []
+
+
+def reset_run_statuses():
+    """Forgets the outcomes of earlier runs in this process."""
+    del run_statuses[:]
+
+
+def get_run_statuses():
+    """Returns the outcomes of the runs since the last reset, as {'tool', 'status'} dictionaries."""
+    return list(run_statuses)
+
+
+def record_run_status(label, status):
+    """Records the outcome of a streamed run."""
+    run_statuses.append({'tool': label, 'status': status})
+
+
+def count_input_lines(data):
+    """Returns the number of lines in a chunk of stdin data, counting an unterminated last line."""
+    if not data:
+        return 0
+    return data.count("\n") + (0 if data.endswith("\n") else 1)
+
+
+def set_progress_queue(queue):
+    """Registers the queue that streamed tools report their progress to."""
+    global progress_queue
+    progress_queue = queue
+
+
+def report_progress(event):
+    """Sends a progress event to the dashboard, if one is listening."""
+    if progress_queue is not None:
+        event['worker'] = os.getpid()
+        try:
+            progress_queue.put(event)
+        except Exception:
+            pass # Progress reporting must never break the tool run
+
+
+# --- Process isolation and resource limits ---
+# Every streamed tool runs in its own session/process group so that it and any
+# children it spawns can be killed together. Limits are set by the task manager
+# in each worker process from the 'resource_limits' section of config.yaml.
+DEFAULT_RESOURCE_LIMITS = {
+    'cpu_seconds': 0,      # CPU time per process (0 = unlimited)
+    'memory_mb': 0,        # Virtual memory per process (0 = unlimited)
+    'max_open_files': 0,   # File descriptors per process (0 = unlimited)
+    'nice': 0,             # Scheduling priority increment (0-19)
+    'kill_grace_seconds': 5,
+}
+
+resource_limits = dict(DEFAULT_RESOURCE_LIMITS)
+
+# Tools currently running in this process, so they can be killed if the process is stopped
+active_processes = set()
+
+
+def get_resource_limits(config):
+    """
+    Returns the resource limits for spawned tools, with config.yaml values overriding the defaults.
+
+    Args:
+        config (dict): The configuration dictionary.
+
+    Returns:
+        dict: The merged resource limits.
+    """
+    limits = dict(DEFAULT_RESOURCE_LIMITS)
+    limits.update(config.get('resource_limits') or {})
+    return limits
+
+
+def set_resource_limits(limits):
+    """Sets the resource limits applied to tools started from this process."""
+    global resource_limits
+    resource_limits = dict(limits)
+
+
+def apply_resource_limits():
+    """
+    Runs in the child between fork and exec: applies the configured rlimits and nice
+    value, which are inherited by everything the tool starts.
+    """
+    limits = resource_limits
+    if limits['cpu_seconds']:
+        # The soft limit sends SIGXCPU; the hard limit a few seconds later sends SIGKILL
+        resource.setrlimit(resource.RLIMIT_CPU, (limits['cpu_seconds'], limits['cpu_seconds'] + 5))
+    if limits['memory_mb']:
+        memory_bytes = int(limits['memory_mb'] * 1024 * 1024)
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+    if limits['max_open_files']:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (limits['max_open_files'], limits['max_open_files']))
+    if limits['nice']:
+        os.nice(limits['nice'])
+
+
+def kill_process_tree(process, grace_seconds=None):
+    """
+    Terminates a tool and every process in its process group: SIGTERM first, then
+    SIGKILL for anything still running after the grace period.
+
+    Args:
+        process (subprocess.Popen): A process started with its own session.
+        grace_seconds (int, optional): Time to wait between SIGTERM and SIGKILL.
+            Defaults to the configured kill_grace_seconds.
     """
-    Executes an external command safely and returns its output.
+    if grace_seconds is None:
+        grace_seconds = resource_limits['kill_grace_seconds']
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+    except (ProcessLookupError, PermissionError):
+        return
+    deadline = time.monotonic() + grace_seconds
+    while time.monotonic() < deadline:
+        try:
+            # WNOWAIT checks whether the tool has exited without reaping it, so its
+            # resource usage can still be collected by wait_with_usage()
+            if os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOHANG | os.WNOWAIT):
+                break
+        except ChildProcessError:
+            break
+        time.sleep(0.1)
+    # Kill whatever is left in the group, including children that ignored SIGTERM
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def kill_active_processes():
+    """Kills the process trees of all tools started from this process."""
+    for process in list(active_processes):
+        kill_process_tree(process)
+
+
+def wait_with_usage(process, started_at):
+    """
+    Waits for a tool to exit and collects the resources it used, including the
+    children it waited for.
+
+    Returns:
+        dict: Wall time, CPU time and peak memory of the tool.
+    """
+    try:
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+    except ChildProcessError:
+        # Already reaped elsewhere; fall back to what Popen knows
+        process.wait()
+        return {'wall_seconds': round(time.monotonic() - started_at, 2)}
+    return {
+        'wall_seconds': round(time.monotonic() - started_at, 2),
+        'cpu_user_seconds': round(usage.ru_utime, 2),
+        'cpu_system_seconds': round(usage.ru_stime, 2),
+        'max_rss_mb': round(usage.ru_maxrss / 1024, 1), # ru_maxrss is in kilobytes on Linux
+    }
+
 
-    This function is a wrapper around Python's subprocess module to provide
-    a standardized way of running external command-line tools.
+def stream_command(command, output_file, label=None, timeout=None, stdin_data=None, line_filter=None):
+    """
+    Executes an external command and streams its standard output, line by line,
+    into an output file while reporting progress to the live dashboard.
 
     Args:
-        command (str): The full command to execute (e.g., "subfinder -d example.com").
+        command (str): The full command to execute (e.g., "katana -list hosts.txt -silent").
+        output_file (str): Path to the file the command's output lines are written to.
+        label (str, optional): Name shown on the dashboard. Defaults to the tool name.
         timeout (int, optional): The maximum time in seconds for the command to complete. Defaults to None.
-        stdin_data (str, optional): Data to be passed to the command's standard input. Defaults to None.
+        stdin_data (str or iterable, optional): Data to be passed to the command's standard input.
+            An iterable of string chunks is written lazily, so large inputs never have to be held
+            in memory. Defaults to None.
+        line_filter (callable, optional): Called with each output line; returns the line to write
+            (possibly rewritten) or None to drop it. Defaults to None.
+
+    The outcome of the run ("done", "timed out", "exit <code>", "not found" or
+    "failed to start") is recorded, see get_run_statuses().
 
     Returns:
-        str: The standard output (stdout) of the command as a string if successful.
-        None: If the command fails, times out, or is not found.
+        int: The number of output lines written if the command ran (possibly partial
+            output if it timed out or failed).
+        None: If the command is not found or could not be started.
     """
-    try:
-        # Use shlex.split to correctly handle commands with arguments and quotes
-        args = shlex.split(command)
-        tool_name = args[0]
+    args = shlex.split(command)
+    tool_name = args[0]
+    label = label or tool_name
 
-        # This is a final check to ensure the tool exists before running it.
-        # shutil.which will find the tool if it's in the PATH (which we've modified).
-        if not shutil.which(tool_name):
-            console.print(f"[bold red][!] Error: Command '{tool_name}' not found. Is it installed correctly and in your PATH?[/bold red]")
-            return None
+    if not shutil.which(tool_name):
+        console.print(f"[bold red][!] Error: Command '{tool_name}' not found. Is it installed correctly and in your PATH?[/bold red]")
+        record_run_status(label, "not found")
+        report_progress({'tool': label, 'event': 'done', 'returncode': None, 'status': "not found"})
+        return None
 
-        process = subprocess.run(
+    try:
+        process = subprocess.Popen(
             args,
-            capture_output=True, # Capture stdout and stderr
-            text=True,           # Decode stdout/stderr as text using default encoding
-            check=False,         # Do not raise CalledProcessError for non-zero exit codes
-            timeout=timeout,     # Apply the specified timeout
-            input=stdin_data     # Pass data to standard input if provided
+            stdin=subprocess.PIPE if stdin_data is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            bufsize=1,  # Line buffered so results arrive as soon as the tool prints them
+            start_new_session=True,  # Own process group, so the whole tree can be killed
+            preexec_fn=apply_resource_limits,
         )
-
-        # Check the return code to see if the command executed successfully
-        if process.returncode != 0:
-            # If there's an error, print a warning with the first line of stderr
-            error_snippet = process.stderr.strip().split('\n')[0] if process.stderr else "No error message."
-            console.print(f"[yellow][!] Warning: Command '{command}' finished with exit code {process.returncode}. Error: {error_snippet}[/yellow]")
-            # Even if there's an error, return any stdout that might have been produced
-            return process.stdout.strip() if process.stdout else None
-
-        # If the command was successful, return its standard output
-        return process.stdout.strip()
-
-    except FileNotFoundError:
-        # This exception is caught if the command itself (the executable) is not found.
-        # shutil.which() should ideally prevent this, but it's a good fallback.
-        console.print(f"[bold red][!] Error: Command '{shlex.split(command)[0]}' not found. Please ensure it's installed and accessible in your PATH.[/bold red]")
-        return None
-    except subprocess.TimeoutExpired as e:
-        # This block handles cases where the command runs longer than 'timeout' seconds.
-        console.print(f"[bold red][!] Error: Command '{command}' timed out after {timeout} seconds. Returning partial output.[/bold red]")
-        # Crucially, we return any standard output collected BEFORE the timeout.
-        return e.stdout.strip() if e.stdout else None
     except Exception as e:
-        # Catch any other unexpected errors during command execution
         console.print(f"[bold red][!] An unexpected error occurred while running '{command}': {e}[/bold red]")
+        record_run_status(label, "failed to start")
+        report_progress({'tool': label, 'event': 'done', 'returncode': None, 'status': "failed to start"})
         return None
+
+    started_at = time.monotonic()
+    active_processes.add(process)
+    report_progress({'tool': label, 'event': 'start', 'pid': process.pid})
+
+    # Feed stdin and drain stderr from helper threads so neither pipe can fill up and block the tool
+    if stdin_data is not None:
+        def feed_stdin():
+            # Writes block once the pipe is full, so the lines fed track what the tool has read.
+            # The total is only known for string input; iterables are generated lazily.
+            if isinstance(stdin_data, str):
+                chunks = io.StringIO(stdin_data)
+                total = count_input_lines(stdin_data)
+            else:
+                chunks, total = stdin_data, None
+            fed = 0
+            last_input_report = time.monotonic()
+            try:
+                for chunk in chunks:
+                    process.stdin.write(chunk)
+                    fed += count_input_lines(chunk)
+                    if time.monotonic() - last_input_report >= PROGRESS_INTERVAL:
+                        report_progress({'tool': label, 'event': 'input', 'fed': fed, 'total': total})
+                        last_input_report = time.monotonic()
+            except (BrokenPipeError, OSError, ValueError):
+                pass # The tool exited (or was killed) before reading all of its input
+            finally:
+                report_progress({'tool': label, 'event': 'input', 'fed': fed, 'total': total})
+                try:
+                    process.stdin.close() # Always signal end of input, even if the data source failed
+                except (BrokenPipeError, OSError):
+                    pass
+        threading.Thread(target=feed_stdin, daemon=True).start()
+
+    stderr_tail = []
+    def drain_stderr():
+        for line in process.stderr:
+            line = line.strip()
+            if not line:
+                continue
+            stderr_tail.append(line)
+            del stderr_tail[:-20]
+            # Tools such as nuclei (-stats -sj) print JSON statistics with a completion percentage
+            if line.startswith('{') and '"percent"' in line:
+                try:
+                    report_progress({'tool': label, 'event': 'progress', 'lines': 0, 'registers': {},
+                                     'percent': float(json.loads(line)['percent'])})
+                except (ValueError, KeyError, TypeError):
+                    pass
+    stderr_thread = threading.Thread(target=drain_stderr, daemon=True)
+    stderr_thread.start()
+
+    timed_out = threading.Event()
+    def kill_on_timeout():
+        timed_out.set()
+        kill_process_tree(process)
+    timer = threading.Timer(timeout, kill_on_timeout) if timeout else None
+    if timer:
+        timer.start()
+
+    lines_written = 0
+    pending_lines = 0
+    # Unique lines are counted with a HyperLogLog sketch; only changed registers are reported
+    sketch = HyperLogLog()
+    pending_registers = {}
+    last_report = time.monotonic()
+    try:
+        with open(output_file, 'w') as out:
+            for line in process.stdout:
+                line = line.strip()
+                if line and line_filter:
+                    line = line_filter(line)
+                if not line:
+                    continue
+                out.write(f"{line}\n")
+                lines_written += 1
+                pending_lines += 1
+                changed = sketch.add(line)
+                if changed:
+                    pending_registers[changed[0]] = changed[1]
+
+                now = time.monotonic()
+                if now - last_report >= PROGRESS_INTERVAL:
+                    out.flush()
+                    report_progress({'tool': label, 'event': 'progress', 'lines': pending_lines, 'registers': pending_registers})
+                    pending_lines, pending_registers = 0, {}
+                    last_report = now
+    except BaseException:
+        # Interrupted or stopped while the tool runs: never leave it behind as an orphan
+        kill_process_tree(process)
+        raise
+    finally:
+        if timer:
+            timer.cancel()
+        usage = wait_with_usage(process, started_at)
+        active_processes.discard(process)
+        stderr_thread.join(timeout=1)
+        # Reported even when the run was interrupted, so killed tools still show what they used
+        report_progress({'tool': label, 'event': 'progress', 'lines': pending_lines, 'registers': pending_registers})
+        if timed_out.is_set():
+            status = "timed out"
+        else:
+            status = "done" if process.returncode == 0 else f"exit {process.returncode}"
+        record_run_status(label, status)
+        report_progress({'tool': label, 'event': 'done', 'returncode': process.returncode, 'usage': usage, 'status': status})
+    if 'cpu_user_seconds' in usage:
+        console.print(
+            f"[cyan][*] {label} used {usage['cpu_user_seconds'] + usage['cpu_system_seconds']:.1f}s CPU, "
+            f"{usage['max_rss_mb']} MB peak memory over {usage['wall_seconds']:.1f}s.[/cyan]"
+        )
+
+    if timed_out.is_set():
+        console.print(f"[bold red][!] Error: Command '{command}' timed out after {timeout} seconds. Keeping partial output.[/bold red]")
+    elif process.returncode != 0:
+        error_snippet = stderr_tail[-1] if stderr_tail else "No error message."
+        console.print(f"[yellow][!] Warning: Command '{command}' finished with exit code {process.returncode}. Error: {error_snippet}[/yellow]")
+
+    return lines_written
@@ -0,0 +1,54 @@
+# This module holds small URL helpers shared by several modules.
+from urllib.parse import urlsplit
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def normalize_origin(value):
+    """
+    Reduces a URL or bare host to its origin (scheme://host[:port]), dropping
+    default ports so https://host and https://host:443 compare equal.
+
+    Args:
+        value (str): A URL or host name. Bare hosts are treated as http://.
+
+    Returns:
+        str: The normalized origin, or None if the value has no valid host.
+    """
+    value = value.strip()
+    if not value:
+        return None
+    if '://' not in value:
+        value = f"http://{value}"
+    parsed = urlsplit(value)
+    try:
+        port = parsed.port
+    except ValueError:
+        return None
+    if not parsed.hostname:
+        return None
+    origin = f"{parsed.scheme.lower()}://{parsed.hostname}"
+    if port and port != DEFAULT_PORTS.get(parsed.scheme.lower()):
+        origin += f":{port}"
+    return origin
+
+
+def url_hostname(value):
+    """
+    Returns the lowercased hostname of a URL, a bare host or a host:port pair.
+
+    Args:
+        value (str): A URL, host name or host:port.
+
+    Returns:
+        str: The hostname, or None if the value has no valid host.
+    """
+    value = value.strip()
+    if not value:
+        return None
+    if '://' not in value:
+        value = f"//{value}"
+    try:
+        return urlsplit(value).hostname
+    except ValueError:
+        return None